@@ -0,0 +1,163 @@
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from freeruns import FreeRunIndex, tightest_block
+from strategies import OBJECTIVES, STRATEGIES, supports
+from topology import Topology, TravelMatrix
+
+
+class Allocator:
+    """Room selection for one hotel topology.
+
+    Holds the topology and its compiled travel matrices, so the selection
+    engine can run on plain room dicts with no database behind it.
+    ``strategy``, ``objective`` and ``budget_ms`` are the defaults for the
+    cross-floor search (see ``strategies``). ``on_select`` is called with
+    the branch taken, the strategy and the duration in seconds after every
+    selection.
+    """
+
+    def __init__(
+        self,
+        topology: Topology,
+        on_select: Optional[Callable[[str, str, float], None]] = None,
+        strategy: str = "exact",
+        objective: str = "path",
+        budget_ms: float = 5.0,
+    ):
+        self.topology = topology
+        self.travel_matrix = TravelMatrix(topology)
+        self.on_select = on_select
+        self.strategy, self.objective = self.resolve(strategy, objective)
+        self.budget_ms = budget_ms
+
+    def _observe(self, branch: str, strategy: str, start: float) -> None:
+        if self.on_select is not None:
+            self.on_select(branch, strategy, time.perf_counter() - start)
+
+    def resolve(self, strategy: Optional[str] = None, objective: Optional[str] = None) -> tuple[str, str]:
+        """Fill in the defaults and check that both names are registered and
+        that the strategy can minimise the objective."""
+        strategy = strategy or self.strategy
+        objective = objective or self.objective
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; choose from {', '.join(STRATEGIES)}")
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective {objective!r}; choose from {', '.join(OBJECTIVES)}")
+        if not supports(strategy, objective):
+            raise ValueError(f"The {strategy} strategy does not support the {objective} objective")
+        return strategy, objective
+
+    def calculate_travel_time(self, room1: dict, room2: dict) -> float:
+        if room1['floor'] == room2['floor']:
+            return abs(room1['position'] - room2['position']) * self.topology.room_travel_time
+        else:
+            vertical_time = abs(room1['floor'] - room2['floor']) * self.topology.floor_travel_time + self.topology.lift_travel_time
+            horizontal_time = abs(room1['position'] - room2['position']) * self.topology.room_travel_time
+            return vertical_time + horizontal_time
+
+    def calculate_total_travel_time(self, rooms: List[dict]) -> float:
+        if len(rooms) <= 1:
+            return 0.0
+
+        total_time = 0.0
+        for i in range(len(rooms) - 1):
+            total_time += self.calculate_travel_time(rooms[i], rooms[i + 1])
+
+        return total_time
+
+    def select_cross_floor_rooms(self, available_rooms: List[dict], num_rooms: int) -> tuple[List[dict], float]:
+        """Pick the num_rooms combination with the minimum total travel time.
+
+        A combination is walked in (floor, position) order, so its cost is a
+        path sum over that order. Free rooms are laid out on a floor x
+        position grid and layer j of the DP holds, for every cell, the
+        cheapest path of j + 1 rooms ending there. Steps from earlier rooms
+        on the same floor and from lower floors reduce to running minima
+        along the grid axes (|p - q| is split into its two signs), so each
+        layer is a handful of NumPy passes over the grid. The path is
+        recovered by walking back through the layers with the precomputed
+        travel matrices.
+        """
+        if len(available_rooms) < num_rooms:
+            raise ValueError("Not enough available rooms")
+
+        by_cell = {(room['floor'], room['position']): room for room in available_rooms}
+        floors, positions = np.array(list(by_cell), dtype=np.intp).T
+        num_floors, num_positions = self.travel_matrix.shape
+        free = np.zeros(self.travel_matrix.shape, dtype=bool)
+        free[floors, positions] = True
+
+        inf = np.inf
+        floor_offset = self.travel_matrix.floor_offset
+        position_offset = self.travel_matrix.position_offset
+        no_floor = np.full((1, num_positions), inf)
+        no_position = np.full((num_floors, 1), inf)
+        layers = [np.where(free, 0.0, inf)]
+        for _ in range(num_rooms - 1):
+            costs = layers[-1]
+            # Best path ending on a strictly lower floor at each position, with
+            # the vertical and horizontal components of the next step factored out
+            down = np.minimum.accumulate(costs - floor_offset - position_offset, axis=0)
+            up = np.minimum.accumulate(costs - floor_offset + position_offset, axis=0)
+            below = np.minimum.accumulate(np.vstack([no_floor, down[:-1]]), axis=1)
+            above = np.minimum.accumulate(np.vstack([no_floor, up[:-1]])[:, ::-1], axis=1)[:, ::-1]
+            cross = np.minimum(below + position_offset, above - position_offset) + floor_offset + self.topology.lift_travel_time
+            # Best path ending at an earlier position on the same floor
+            same = np.minimum.accumulate(costs - position_offset, axis=1)
+            same = np.hstack([no_position, same[:, :-1]]) + position_offset
+            layers.append(np.where(free, np.minimum(cross, same), inf))
+
+        end = int(np.argmin(layers[-1]))
+        path = [divmod(end, num_positions)]
+        for costs in reversed(layers[:-1]):
+            floor, pos = path[-1]
+            # Cells strictly before (floor, pos) in walk order are a flat prefix
+            steps = costs + self.travel_matrix.floor_cost[:, floor][:, None] + self.travel_matrix.position_cost[:, pos][None, :]
+            path.append(divmod(int(np.argmin(steps.ravel()[:floor * num_positions + pos])), num_positions))
+
+        selected = [by_cell[cell] for cell in reversed(path)]
+        return selected, self.calculate_total_travel_time(selected)
+
+    def select_optimal_rooms(
+        self,
+        available_rooms: List[dict],
+        num_rooms: int,
+        strategy: Optional[str] = None,
+        objective: Optional[str] = None,
+        free_runs: Optional[FreeRunIndex] = None,
+    ) -> tuple[List[dict], float]:
+        """Same floor first, else the cross-floor strategy's pick.
+
+        The same-floor pick is the tightest block on any floor. Pass
+        ``free_runs`` when an up-to-date index of exactly ``available_rooms``
+        is at hand (see ``OccupancyEngine.free_runs_for``) to look it up
+        instead of scanning the rooms. The returned travel time is
+        always the walking path through the rooms in (floor, position)
+        order, whichever objective chose them.
+        """
+        if len(available_rooms) < num_rooms:
+            raise ValueError("Not enough available rooms")
+
+        strategy, objective = self.resolve(strategy, objective)
+        start = time.perf_counter()
+
+        # Priority 1: The smallest span of rooms on a single floor
+        if free_runs is not None and num_rooms <= free_runs.max_party:
+            selected = free_runs.block(num_rooms)
+        else:
+            selected = tightest_block(available_rooms, num_rooms)
+        if selected is not None:
+            self._observe("same_floor", strategy, start)
+            return list(selected), self.calculate_total_travel_time(selected)
+
+        # Priority 2: Find a combination across floors that minimises the
+        # objective, as well as the strategy can
+        selected = sorted(
+            STRATEGIES[strategy](self, available_rooms, num_rooms, OBJECTIVES[objective], self.budget_ms / 1000),
+            key=lambda room: (room['floor'], room['position'])
+        )
+        self._observe("cross_floor", strategy, start)
+        return selected, self.calculate_total_travel_time(selected)
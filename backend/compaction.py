@@ -0,0 +1,117 @@
+from typing import Dict, List, Optional, Tuple
+
+from occupancy import OccupancyEngine
+
+
+def longest_run(free: int) -> int:
+    length = 0
+    while free:
+        free &= free >> 1
+        length += 1
+    return length
+
+
+def stranded(free: int) -> int:
+    """Free rooms on a floor outside its longest contiguous free block."""
+    return free.bit_count() - longest_run(free)
+
+
+def flush_windows(free: int, size: int) -> List[int]:
+    """Start positions of ``size`` adjacent free rooms flush with a run's end.
+
+    Windows in the middle of a free run would split it, so only those
+    touching an occupied room or the end of the corridor are tried.
+    """
+    starts = free
+    for i in range(1, size):
+        starts &= free >> i
+    flush = starts & (~(free << 1) | ~(free >> size))
+    positions = []
+    while flush:
+        low = flush & -flush
+        positions.append(low.bit_length() - 1)
+        flush ^= low
+    return positions
+
+
+class CompactionPlanner:
+    """Proposes room moves that rebuild contiguous same-floor free blocks.
+
+    Works on tonight's occupancy. A walk-in booking may move as a whole into
+    adjacent free rooms on one floor when that leaves fewer free rooms
+    stranded outside their floor's longest free block. Adjacent rooms on one
+    floor are the shortest possible walk, so no move lengthens a party's
+    travel. Moves are picked greedily, best gain first, and nothing is
+    applied: the plan is for staff to act on.
+    """
+
+    def __init__(self, engine: OccupancyEngine, free_rooms: List[dict]):
+        self.engine = engine
+        self.free: Dict[int, int] = {floor: 0 for floor in engine.floors}
+        for room in free_rooms:
+            self.free[room["floor"]] |= 1 << room["position"]
+
+    def bookings(self) -> List[Tuple[Optional[str], List[int]]]:
+        # Rooms booked without a booking ID (e.g. by /random) move alone
+        grouped: Dict[str, List[int]] = {}
+        singles = []
+        for room_number, booking_id in self.engine.booking_ids.items():
+            if booking_id is None:
+                singles.append((None, [room_number]))
+            else:
+                grouped.setdefault(booking_id, []).append(room_number)
+        return [(booking_id, sorted(rooms)) for booking_id, rooms in grouped.items()] + singles
+
+    def best_move(self, room_numbers: List[int]) -> Optional[Tuple[int, int, int]]:
+        """(gain, floor, start) of the best window to move into, if any helps."""
+        source: Dict[int, int] = {}
+        for number in room_numbers:
+            room = self.engine.rooms[number]
+            source[room["floor"]] = source.get(room["floor"], 0) | 1 << room["position"]
+        size = len(room_numbers)
+
+        # The booking's own rooms count as free once it moves
+        freed = {floor: self.free[floor] | bits for floor, bits in source.items()}
+        before = sum(stranded(self.free[floor]) for floor in source)
+        best = None
+        for floor, free in self.free.items():
+            free = freed.get(floor, free)
+            old = before if floor in source else before + stranded(free)
+            for start in flush_windows(free, size):
+                window = ((1 << size) - 1) << start
+                if window == source.get(floor):
+                    continue
+                after = dict(freed)
+                after[floor] = free & ~window
+                gain = old - sum(stranded(mask) for mask in after.values())
+                if gain > 0 and (best is None or gain > best[0]):
+                    best = (gain, floor, start)
+        return best
+
+    def plan(self, max_moves: int = 10) -> dict:
+        stranded_before = sum(stranded(free) for free in self.free.values())
+        bookings = self.bookings()
+        moves = []
+        for _ in range(max_moves):
+            candidates = []
+            for index, (_, room_numbers) in enumerate(bookings):
+                move = self.best_move(room_numbers)
+                if move is not None:
+                    candidates.append((move, index))
+            if not candidates:
+                break
+
+            (gain, floor, start), index = max(candidates, key=lambda candidate: candidate[0][0])
+            booking_id, room_numbers = bookings.pop(index)
+            targets = [self.engine.floors[floor][start + i]["room_number"] for i in range(len(room_numbers))]
+            for number in room_numbers:
+                room = self.engine.rooms[number]
+                self.free[room["floor"]] |= 1 << room["position"]
+            self.free[floor] &= ~(((1 << len(room_numbers)) - 1) << start)
+            moves.append({"booking_id": booking_id, "from": room_numbers, "to": targets, "stranded_rooms_recovered": gain})
+
+        return {
+            "moves": moves,
+            "stranded_rooms_before": stranded_before,
+            "stranded_rooms_after": sum(stranded(free) for free in self.free.values()),
+        }
@@ -0,0 +1,79 @@
+import time
+from typing import Dict, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+WRITE_LEASE_SECONDS = 30.0
+
+
+class SharedVersions:
+    """Per-hotel occupancy versions shared by worker processes through Mongo.
+
+    A worker takes the next version before writing room changes and stamps
+    the rooms it writes with it. Each write holds a lease on its version in
+    the hotel's ``writes`` list until it finishes. Workers poll every
+    version at a fixed interval; a version they have not seen means another
+    worker changed rooms, so they fetch the rooms stamped after the last
+    version they synced. Rooms are only known to be in Mongo up to the
+    version below the oldest open lease, so workers move no further than
+    that. A lease that outlives ``lease_seconds`` (its worker died or lost
+    Mongo mid-write) stops holding them back and is removed.
+    """
+
+    def __init__(self, collection, lease_seconds: float = WRITE_LEASE_SECONDS):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+
+    async def register(self, hotel_id: str) -> Tuple[int, int]:
+        """(version, settled version) of the hotel, creating it if new."""
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"_id": hotel_id},
+                {"$setOnInsert": {"version": 0, "writes": []}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Another worker created it first
+            doc = await self.collection.find_one({"_id": hotel_id})
+        return doc["version"], self._settled(doc, time.time())
+
+    async def begin(self, hotel_id: str) -> int:
+        """Take the next version and a lease on it."""
+        while True:
+            doc = await self.collection.find_one({"_id": hotel_id}, {"version": 1})
+            version = doc["version"] + 1
+            lease = {"version": version, "expires_at": time.time() + self.lease_seconds}
+            # Versions are compared and set in one update, so the lease is
+            # visible as soon as its version is
+            result = await self.collection.update_one(
+                {"_id": hotel_id, "version": doc["version"]},
+                {"$set": {"version": version}, "$push": {"writes": lease}},
+            )
+            if result.modified_count:
+                return version
+
+    async def end(self, hotel_id: str, version: int) -> None:
+        await self.collection.update_one({"_id": hotel_id}, {"$pull": {"writes": {"version": version}}})
+
+    async def current(self) -> Dict[str, Tuple[int, int]]:
+        """(version, settled version) of every hotel.
+
+        Rooms stamped up to the settled version are all in Mongo. Expired
+        leases are removed on the way.
+        """
+        now = time.time()
+        versions = {}
+        expired = False
+        async for doc in self.collection.find({}, {"version": 1, "writes": 1}):
+            versions[doc["_id"]] = (doc["version"], self._settled(doc, now))
+            expired = expired or any(lease["expires_at"] <= now for lease in doc.get("writes") or [])
+        if expired:
+            await self.collection.update_many({}, {"$pull": {"writes": {"expires_at": {"$lte": now}}}})
+        return versions
+
+    @staticmethod
+    def _settled(doc: dict, now: float) -> int:
+        open_versions = [lease["version"] for lease in doc.get("writes") or [] if lease["expires_at"] > now]
+        return min(open_versions) - 1 if open_versions else doc["version"]
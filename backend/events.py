@@ -0,0 +1,61 @@
+import asyncio
+import secrets
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple
+
+
+class Subscription:
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Tuple[int, List[dict]]]" = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+
+class ChangeFeed:
+    """Versioned stream of room-state patches.
+
+    Every occupancy mutation is published as a list of partial room
+    documents (``room_number`` plus the fields that changed) under the next
+    version number. The last ``history`` versions are kept so a client that
+    reconnects with the version it last saw can catch up without
+    downloading the full room list again. ``epoch`` is random per process,
+    so versions from before a restart, or from another worker, are never
+    mistaken for current ones.
+    """
+
+    def __init__(self, history: int = 1000, subscriber_queue: int = 1000):
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+        self.subscriber_queue = subscriber_queue
+        self._history: Deque[Tuple[int, List[dict]]] = deque(maxlen=history)
+        self._subscribers: Set[Subscription] = set()
+
+    def publish(self, changes: List[dict]) -> int:
+        if not changes:
+            return self.version
+        self.version += 1
+        entry = (self.version, changes)
+        self._history.append(entry)
+        for subscription in self._subscribers:
+            try:
+                subscription.queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+        return self.version
+
+    def replay(self, since: int) -> Optional[List[Tuple[int, List[dict]]]]:
+        """Changes after ``since``, or None if they are no longer buffered."""
+        if since > self.version:
+            return None
+        if since == self.version:
+            return []
+        if not self._history or self._history[0][0] > since + 1:
+            return None
+        return [entry for entry in self._history if entry[0] > since]
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.subscriber_queue)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
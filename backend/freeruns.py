@@ -0,0 +1,77 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_PARTY = 5
+
+# (span in positions, floor, index of the window's first room on the floor)
+Window = Tuple[int, int, int]
+
+
+def tightest_window(positions: List[int], size: int) -> Optional[Tuple[int, int]]:
+    """(span, start index) of the ``size`` adjacent sorted positions spanning least."""
+    spans = [last - first for first, last in zip(positions, positions[size - 1:])]
+    if not spans:
+        return None
+    span = min(spans)
+    return span, spans.index(span)
+
+
+def tightest_block(rooms: Iterable[dict], num_rooms: int) -> Optional[List[dict]]:
+    """One-off scan for the tightest ``num_rooms`` free rooms on one floor.
+
+    Floors are tried lowest first and the scan stops at the first fully
+    adjacent block, which no later floor can beat.
+    """
+    floors: Dict[int, List[dict]] = {}
+    for room in rooms:
+        floors.setdefault(room['floor'], []).append(room)
+    best = None
+    for floor in sorted(floors):
+        free = sorted(floors[floor], key=lambda room: room['position'])
+        window = tightest_window([room['position'] for room in free], num_rooms)
+        if window is not None and (best is None or window[0] < best[0]):
+            best = (window[0], free[window[1]:window[1] + num_rooms])
+            if best[0] == num_rooms - 1:
+                break
+    return best[1] if best is not None else None
+
+
+class FreeRunIndex:
+    """Tightest block of free rooms on each floor, per party size.
+
+    For every floor and party size 1..``max_party`` it keeps the window of
+    that many free rooms, adjacent in position order, with the smallest
+    span; same-floor travel time is the span times the room travel time.
+    ``update`` recomputes only the floors it is given, so keeping the index
+    in step with bookings costs one pass over the touched floors, and the
+    best block for a party is a lookup.
+    """
+
+    def __init__(self, max_party: int = MAX_PARTY):
+        self.max_party = max_party
+        self.free: Dict[int, List[dict]] = {}
+        self.windows: Dict[int, List[Optional[Window]]] = {}
+        self.best: List[Optional[Window]] = [None] * max_party
+
+    def update(self, floors: Dict[int, List[dict]]) -> None:
+        """Replace the free rooms (sorted by position) of the given floors."""
+        for floor, free in floors.items():
+            self.free[floor] = free
+            positions = [room['position'] for room in free]
+            windows = []
+            for size in range(1, self.max_party + 1):
+                window = tightest_window(positions, size)
+                windows.append(None if window is None else (window[0], floor, window[1]))
+            self.windows[floor] = windows
+        # Ties go to the lowest floor, then the lowest position
+        self.best = [
+            min((windows[size] for windows in self.windows.values() if windows[size] is not None), default=None)
+            for size in range(self.max_party)
+        ]
+
+    def block(self, num_rooms: int) -> Optional[List[dict]]:
+        """The tightest ``num_rooms`` free rooms on one floor, if any floor has that many."""
+        window = self.best[num_rooms - 1]
+        if window is None:
+            return None
+        _, floor, start = window
+        return self.free[floor][start:start + num_rooms]
@@ -0,0 +1,31 @@
+"""Gunicorn settings for running several uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py server:app
+
+WEB_CONCURRENCY sets the number of workers. Workers keep their in-memory
+occupancy in step through Mongo (OCCUPANCY_SYNC_SECONDS), and each gets its
+own booking-ID node: BOOKING_NODE_ID identifies the host (0-255, default 0)
+and the worker's slot among the live workers fills the low byte.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8001')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Event streams stay open indefinitely; let them drain on restart
+graceful_timeout = 20
+
+os.environ.setdefault("OCCUPANCY_SYNC_SECONDS", "0.25")
+
+
+def pre_fork(server, worker):
+    # Give the new worker the lowest node slot no live worker holds, so
+    # respawned workers reuse slots instead of wrapping into a live one
+    taken = {getattr(live, "booking_slot", None) for live in server.WORKERS.values()}
+    worker.booking_slot = min(slot for slot in range(256) if slot not in taken)
+
+
+def post_fork(server, worker):
+    host = int(os.environ.get("BOOKING_NODE_ID") or 0) & 0xFF
+    os.environ["BOOKING_NODE_ID"] = str(host << 8 | worker.booking_slot)
@@ -0,0 +1,91 @@
+import base64
+from typing import Callable, Dict, Optional, Tuple
+
+import orjson
+
+from allocation import Allocator
+from cache import LRUCache
+from events import ChangeFeed
+from occupancy import OccupancyEngine
+from topology import Topology
+
+
+class Hotel:
+    """State for one property: layout, occupancy, selection cache and feed.
+
+    Nothing here is shared between hotels, so bookings at one property never
+    invalidate another's cached selections or wake its event subscribers.
+    """
+
+    def __init__(
+        self,
+        hotel_id: str,
+        topology: Topology,
+        cache_size: int,
+        on_select: Optional[Callable[[str, str, float], None]] = None,
+        **allocation,
+    ):
+        self.hotel_id = hotel_id
+        self.topology = topology
+        self.allocator = Allocator(topology, on_select=on_select, **allocation)
+        self.occupancy = OccupancyEngine()
+        # Selections keyed on (occupancy fingerprint, num_rooms, strategy,
+        # objective). Any booking or reset changes the fingerprint, so stale
+        # entries are never hit again.
+        self.selection_cache = LRUCache(cache_size)
+        # Room-state patches for /rooms/events, versioned per mutation
+        self.feed = ChangeFeed()
+        # Latest room-move proposals from the compaction pass
+        self.compaction: Optional[dict] = None
+        # Encoded /rooms payloads by format, with the feed version they show
+        self.room_payloads: Dict[str, Tuple[int, bytes]] = {}
+
+    def generate_rooms(self) -> list:
+        return [{"hotel_id": self.hotel_id, **room} for room in self.topology.generate_rooms()]
+
+    def room_payload(self, format: str = "full") -> bytes:
+        """The room listing as JSON, encoded once per feed version.
+
+        ``full`` lists every room document. ``compact`` sends the layout as
+        parallel arrays and occupancy as a base64 bitmap over
+        ``room_numbers``, without per-room booking details or reservations.
+        """
+        version = self.feed.version
+        cached = self.room_payloads.get(format)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        occupancy = self.occupancy
+        if format == "compact":
+            rooms = [occupancy.rooms[number] for number in occupancy.room_numbers]
+            body = {
+                "hotel_id": self.hotel_id,
+                "room_numbers": occupancy.room_numbers,
+                "floors": [room["floor"] for room in rooms],
+                "positions": [room["position"] for room in rooms],
+                "booked": base64.b64encode(occupancy.booked_bitmap()).decode(),
+                "version": version,
+                "epoch": self.feed.epoch,
+            }
+        else:
+            body = {"rooms": occupancy.documents(hotel_id=self.hotel_id), "version": version, "epoch": self.feed.epoch}
+        payload = orjson.dumps(body)
+        self.room_payloads[format] = (version, payload)
+        return payload
+
+
+class HotelRegistry:
+    """Hotels by ID, in config order; the first one is the default."""
+
+    def __init__(self, hotels: Dict[str, Hotel]):
+        self.hotels = hotels
+        self.default_id = next(iter(hotels))
+
+    def __iter__(self):
+        return iter(self.hotels.values())
+
+    def __len__(self) -> int:
+        return len(self.hotels)
+
+    def get(self, hotel_id: Optional[str] = None) -> Optional[Hotel]:
+        return self.hotels.get(hotel_id or self.default_id)
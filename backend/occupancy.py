@@ -0,0 +1,288 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from freeruns import FreeRunIndex
+from reservations import IntervalIndex, Stay
+
+
+class OccupancyEngine:
+    """Authoritative in-memory room occupancy, one bitmask per floor.
+
+    Bit ``position`` of ``masks[floor]`` is set when that room is booked.
+    Room dicts are built once at load time and handed out by reference, so
+    reading availability allocates no per-room objects. Dated reservations
+    live in a per-room ``IntervalIndex``, only for rooms that have any.
+    ``free_runs`` indexes the rooms free for a walk-in tonight: neither
+    booked nor reserved for tonight (``reserved_masks``). It is refreshed
+    for the floors each booking, release or reservation touches, and
+    rebuilt when the date changes.
+    """
+
+    def __init__(self):
+        self.rooms: Dict[int, dict] = {}
+        self.room_numbers: List[int] = []
+        self.floors: Dict[int, Dict[int, dict]] = {}
+        self.full_masks: Dict[int, int] = {}
+        self.masks: Dict[int, int] = {}
+        self.booked_at: Dict[int, Optional[str]] = {}
+        self.booking_ids: Dict[int, Optional[str]] = {}
+        self.reservations: Dict[int, IntervalIndex] = {}
+        self.reservations_version = 0
+        self.free_runs = FreeRunIndex()
+        # (check_in, check_out) of the night reserved_masks describe, once
+        # a walk-in stay has asked for the index
+        self.tonight: Optional[Tuple[str, str]] = None
+        self.reserved_masks: Dict[int, int] = {}
+
+    def load(self, room_docs: Iterable[dict]) -> None:
+        self.__init__()
+        for doc in room_docs:
+            room = {
+                "room_number": doc["room_number"],
+                "floor": doc["floor"],
+                "position": doc["position"],
+            }
+            floor, bit = room["floor"], 1 << room["position"]
+            self.rooms[room["room_number"]] = room
+            self.floors.setdefault(floor, {})[room["position"]] = room
+            self.full_masks[floor] = self.full_masks.get(floor, 0) | bit
+            self.masks.setdefault(floor, 0)
+            if doc.get("is_booked"):
+                self.masks[floor] |= bit
+                self.booked_at[room["room_number"]] = doc.get("booked_at")
+                self.booking_ids[room["room_number"]] = doc.get("booking_id")
+            self._load_reservations(room["room_number"], doc.get("reservations") or [])
+        self.floors = dict(sorted(self.floors.items()))
+        self.room_numbers = sorted(self.rooms)
+        self._refresh_free_runs(self.floors)
+
+    def _load_reservations(self, room_number: int, reservations: List[dict]) -> None:
+        self.reservations.pop(room_number, None)
+        for reservation in reservations:
+            index = self.reservations.setdefault(room_number, IntervalIndex())
+            index.add(reservation["check_in"], reservation["check_out"], reservation["booking_id"])
+        self.reservations_version += 1
+
+    @property
+    def total_rooms(self) -> int:
+        return len(self.rooms)
+
+    @property
+    def booked_count(self) -> int:
+        return sum(mask.bit_count() for mask in self.masks.values())
+
+    @property
+    def available_count(self) -> int:
+        return self.total_rooms - self.booked_count
+
+    def fingerprint(self, stay: Optional[Stay] = None) -> tuple:
+        """Compact, exact key for availability over ``stay``."""
+        current = stay is None or stay.current
+        return (
+            tuple(self.masks.values()) if current else None,
+            self.reservations_version,
+            (stay.check_in, stay.check_out) if stay else None,
+        )
+
+    def _free_on_floor(self, floor: int) -> List[dict]:
+        rooms_on_floor = self.floors[floor]
+        free = self.full_masks[floor] & ~self.masks[floor] & ~self.reserved_masks.get(floor, 0)
+        rooms = []
+        while free:
+            low = free & -free
+            rooms.append(rooms_on_floor[low.bit_length() - 1])
+            free ^= low
+        return rooms
+
+    def _refresh_free_runs(self, floors: Iterable[int]) -> None:
+        self.free_runs.update({floor: self._free_on_floor(floor) for floor in floors})
+
+    def _mark_reserved(self, room_numbers: Iterable[int]) -> Set[int]:
+        """Update tonight's reserved bits for these rooms; returns their floors."""
+        floors = set()
+        if self.tonight is None:
+            return floors
+        check_in, check_out = self.tonight
+        for room_number in room_numbers:
+            room = self.rooms[room_number]
+            index = self.reservations.get(room_number)
+            bit = 1 << room["position"]
+            mask = self.reserved_masks.get(room["floor"], 0)
+            if index is not None and index.overlaps(check_in, check_out):
+                self.reserved_masks[room["floor"]] = mask | bit
+            else:
+                self.reserved_masks[room["floor"]] = mask & ~bit
+            floors.add(room["floor"])
+        return floors
+
+    def free_runs_for(self, stay: Optional[Stay] = None) -> Optional[FreeRunIndex]:
+        """``free_runs`` if it indexes exactly ``available_rooms(stay)``.
+
+        That holds for a one-night stay tonight, the walk-in case; the first
+        such stay on a new date rebuilds tonight's reserved masks. Without a
+        stay reservations are ignored, so the index applies only while none
+        covers tonight. Other stays get None and are scanned.
+        """
+        if stay is None:
+            return None if any(self.reserved_masks.values()) else self.free_runs
+        if self.tonight != (stay.check_in, stay.check_out):
+            nights = date.fromisoformat(stay.check_out) - date.fromisoformat(stay.check_in)
+            if not stay.current or nights != timedelta(days=1):
+                return None
+            self.tonight = (stay.check_in, stay.check_out)
+            self.reserved_masks = {}
+            self._mark_reserved(self.reservations)
+            self._refresh_free_runs(self.floors)
+        return self.free_runs
+
+    def is_booked(self, room_number: int) -> bool:
+        room = self.rooms[room_number]
+        return bool(self.masks[room["floor"]] >> room["position"] & 1)
+
+    def available_rooms(self, stay: Optional[Stay] = None) -> List[dict]:
+        """Free rooms ordered by (floor, position).
+
+        Without a stay this is current occupancy only. With one, rooms
+        holding an overlapping reservation are left out too, and current
+        occupancy only counts if the stay includes tonight.
+        """
+        current = stay is None or stay.current
+        reservations = self.reservations if stay is not None else {}
+        available = []
+        for floor, rooms_on_floor in self.floors.items():
+            free = self.full_masks[floor] & ~self.masks[floor] if current else self.full_masks[floor]
+            while free:
+                low = free & -free
+                room = rooms_on_floor[low.bit_length() - 1]
+                free ^= low
+                index = reservations.get(room["room_number"])
+                if index is None or not index.overlaps(stay.check_in, stay.check_out):
+                    available.append(room)
+        return available
+
+    def book(self, room_numbers: Iterable[int], timestamp: str, booking_id: Optional[str] = None) -> None:
+        room_numbers = list(room_numbers)
+        for room_number in room_numbers:
+            if self.is_booked(room_number):
+                raise ValueError(f"Room {room_number} is already booked")
+        for room_number in room_numbers:
+            room = self.rooms[room_number]
+            self.masks[room["floor"]] |= 1 << room["position"]
+            self.booked_at[room_number] = timestamp
+            self.booking_ids[room_number] = booking_id
+        self._refresh_free_runs({self.rooms[room_number]["floor"] for room_number in room_numbers})
+
+    def release(self, room_numbers: Iterable[int]) -> None:
+        floors = set()
+        for room_number in room_numbers:
+            room = self.rooms[room_number]
+            self.masks[room["floor"]] &= ~(1 << room["position"])
+            self.booked_at.pop(room_number, None)
+            self.booking_ids.pop(room_number, None)
+            floors.add(room["floor"])
+        self._refresh_free_runs(floors)
+
+    def booked_before(self, day: str) -> List[int]:
+        """Rooms whose walk-in booking was made before ``day`` (an ISO date)."""
+        return [room_number for room_number, booked_at in self.booked_at.items() if booked_at and booked_at < day]
+
+    def documents(self, **fields) -> List[dict]:
+        """Every room's state by room number, shaped like its Mongo document.
+
+        ``fields`` (e.g. ``hotel_id``) lead each document.
+        """
+        booked_at, booking_ids = self.booked_at, self.booking_ids
+        return [
+            {
+                **fields,
+                **self.rooms[room_number],
+                "is_booked": room_number in booked_at,
+                "booked_at": booked_at.get(room_number),
+                "booking_id": booking_ids.get(room_number),
+                "reservations": self.reservations_of(room_number) if room_number in self.reservations else [],
+            }
+            for room_number in self.room_numbers
+        ]
+
+    def booked_bitmap(self) -> bytes:
+        """Bit ``i`` (little-endian) is set when ``room_numbers[i]`` is booked."""
+        bits = 0
+        for i, room_number in enumerate(self.room_numbers):
+            if room_number in self.booked_at:
+                bits |= 1 << i
+        return bits.to_bytes((len(self.room_numbers) + 7) // 8, "little")
+
+    def reserve(self, room_numbers: Iterable[int], stay: Stay, booking_id: str) -> None:
+        room_numbers = list(room_numbers)
+        added = []
+        try:
+            for room_number in room_numbers:
+                self.reservations.setdefault(room_number, IntervalIndex()).add(stay.check_in, stay.check_out, booking_id)
+                added.append(room_number)
+        except ValueError:
+            self.unreserve(added, booking_id)
+            raise
+        self.reservations_version += 1
+        self._refresh_free_runs(self._mark_reserved(room_numbers))
+
+    def unreserve(self, room_numbers: Iterable[int], booking_id: str) -> None:
+        room_numbers = list(room_numbers)
+        for room_number in room_numbers:
+            index = self.reservations.get(room_number)
+            if index is not None and index.remove(booking_id) and not index:
+                del self.reservations[room_number]
+        self.reservations_version += 1
+        self._refresh_free_runs(self._mark_reserved(room_numbers))
+
+    def reservations_of(self, room_number: int) -> List[dict]:
+        index = self.reservations.get(room_number)
+        if index is None:
+            return []
+        return [
+            {"check_in": start, "check_out": end, "booking_id": booking_id}
+            for start, end, booking_id in zip(index.starts, index.ends, index.booking_ids)
+        ]
+
+    def sync(self, room_docs: Iterable[dict]) -> List[dict]:
+        """Overwrite the state of the given rooms with what Mongo holds.
+
+        Returns the documents of rooms whose state actually changed.
+        """
+        changed = []
+        floors = set()
+        for doc in room_docs:
+            room = self.rooms.get(doc["room_number"])
+            if room is None:
+                continue
+            if (
+                bool(doc.get("is_booked")) == self.is_booked(room["room_number"])
+                and doc.get("booked_at") == self.booked_at.get(room["room_number"])
+                and doc.get("booking_id") == self.booking_ids.get(room["room_number"])
+                and (doc.get("reservations") or []) == self.reservations_of(room["room_number"])
+            ):
+                continue
+            changed.append(doc)
+            floors.add(room["floor"])
+            bit = 1 << room["position"]
+            if doc.get("is_booked"):
+                self.masks[room["floor"]] |= bit
+                self.booked_at[room["room_number"]] = doc.get("booked_at")
+                self.booking_ids[room["room_number"]] = doc.get("booking_id")
+            else:
+                self.masks[room["floor"]] &= ~bit
+                self.booked_at.pop(room["room_number"], None)
+                self.booking_ids.pop(room["room_number"], None)
+            self._load_reservations(room["room_number"], doc.get("reservations") or [])
+        floors |= self._mark_reserved([doc["room_number"] for doc in changed])
+        self._refresh_free_runs(floors)
+        return changed
+
+    def release_all(self) -> List[int]:
+        """Free every room and return the numbers of those that were booked."""
+        released = list(self.booked_at)
+        for floor in self.masks:
+            self.masks[floor] = 0
+        self.booked_at.clear()
+        self.booking_ids.clear()
+        self._refresh_free_runs(self.floors)
+        return released
@@ -0,0 +1,64 @@
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional
+
+
+class Stay(NamedTuple):
+    """Nights a booking occupies, as ISO dates over ``[check_in, check_out)``.
+
+    ``reserved`` is set for dated reservations; walk-in bookings cover
+    tonight only and set ``is_booked`` instead, which is cleared once the
+    date rolls over. ``current`` is set when the
+    stay includes tonight, so rooms booked right now are unavailable.
+    """
+
+    check_in: str
+    check_out: str
+    reserved: bool
+    current: bool
+
+    @classmethod
+    def resolve(cls, check_in: Optional[date], check_out: Optional[date], today: date) -> "Stay":
+        if check_in is None:
+            return cls(today.isoformat(), (today + timedelta(days=1)).isoformat(), False, True)
+        if check_in < today:
+            raise ValueError("check_in cannot be in the past")
+        return cls(check_in.isoformat(), check_out.isoformat(), True, check_in == today)
+
+
+class IntervalIndex:
+    """Non-overlapping ``[check_in, check_out)`` reservations of one room.
+
+    Intervals never overlap, so sorting by start also sorts by end and an
+    overlap test is a single bisect over the ends.
+    """
+
+    __slots__ = ("starts", "ends", "booking_ids")
+
+    def __init__(self):
+        self.starts: List[str] = []
+        self.ends: List[str] = []
+        self.booking_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, start: str, end: str) -> bool:
+        i = bisect_right(self.ends, start)
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, start: str, end: str, booking_id: str) -> None:
+        if self.overlaps(start, end):
+            raise ValueError(f"Reservation {start}..{end} overlaps an existing one")
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.booking_ids.insert(i, booking_id)
+
+    def remove(self, booking_id: str) -> bool:
+        try:
+            i = self.booking_ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[i], self.ends[i], self.booking_ids[i]
+        return True
@@ -1,240 +1,1179 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateMany
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
-from datetime import datetime, timezone
-from itertools import combinations
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import Annotated, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Union
+from datetime import date, datetime, timedelta, timezone
 import random
+import asyncio
+import base64
+import csv
+import io
+import itertools
+import json
+
+from cache import TTLCache
+from compaction import CompactionPlanner
+from coordination import SharedVersions
+from freeruns import FreeRunIndex
+from hotels import Hotel, HotelRegistry
+from ids import BookingIdGenerator
+from metrics import Counter, Gauge, Histogram, MetricsMiddleware, MongoCommandTimer, Registry
+from reservations import Stay
+from topology import load_hotels
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Metrics, served at /metrics. Histograms cost a bisect per observation and
+# gauges are read only at scrape time.
+metrics_registry = Registry()
+REQUEST_SECONDS = metrics_registry.register(Histogram(
+    "hotel_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+))
+SELECTION_SECONDS = metrics_registry.register(Histogram(
+    "hotel_selection_duration_seconds", "Room selection time by hotel, algorithm branch and strategy", ("hotel", "branch", "strategy")
+))
+MONGO_SECONDS = metrics_registry.register(Histogram(
+    "hotel_mongo_command_duration_seconds", "Mongo round-trip time by command", ("command",)
+))
+MONGO_FAILURES = metrics_registry.register(Counter(
+    "hotel_mongo_command_failures_total", "Failed Mongo commands by command", ("command",)
+))
+
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandTimer(MONGO_SECONDS, MONGO_FAILURES)])
 db = client[os.environ['DB_NAME']]
 
+# One set of in-memory state per property: occupancy (loaded at startup and
+# written through to Mongo), selection cache and change feed. Room and
+# booking documents carry the hotel_id they belong to.
+def selection_observer(hotel_id: str):
+    return lambda branch, strategy, seconds: SELECTION_SECONDS.observe(seconds, hotel_id, branch, strategy)
+
+# Default cross-floor strategy and objective; requests may override them.
+# ALLOCATION_BUDGET_MS bounds the anytime strategy.
+ALLOCATION_DEFAULTS = {
+    "strategy": os.environ.get('ALLOCATION_STRATEGY') or "exact",
+    "objective": os.environ.get('ALLOCATION_OBJECTIVE') or "path",
+    "budget_ms": float(os.environ.get('ALLOCATION_BUDGET_MS') or 5),
+}
+
+hotels = HotelRegistry({
+    hotel_id: Hotel(
+        hotel_id, topology, int(os.environ.get('SELECTION_CACHE_SIZE') or 1024), selection_observer(hotel_id),
+        **ALLOCATION_DEFAULTS
+    )
+    for hotel_id, topology in load_hotels().items()
+})
+
+# Time-ordered booking IDs; set BOOKING_NODE_ID to pin this process's node
+new_booking_id = BookingIdGenerator()
+
+# With several worker processes (see gunicorn.conf.py), set
+# OCCUPANCY_SYNC_SECONDS so each worker shares a per-hotel version in Mongo
+# and reloads rooms changed by the others at that interval. Room claims are
+# conditional updates either way, so stale memory costs a retry, never a
+# double booking.
+OCCUPANCY_SYNC_SECONDS = float(os.environ.get('OCCUPANCY_SYNC_SECONDS') or 0)
+shared_versions = SharedVersions(db.occupancy_versions) if OCCUPANCY_SYNC_SECONDS > 0 else None
+
+metrics_registry.register(Gauge(
+    "hotel_rooms", "Rooms by hotel and current occupancy state", ("hotel", "state"),
+    lambda: {
+        labels: value for hotel in hotels for labels, value in (
+            ((hotel.hotel_id, "booked"), hotel.occupancy.booked_count),
+            ((hotel.hotel_id, "available"), hotel.occupancy.available_count),
+        )
+    }
+))
+metrics_registry.register(Gauge(
+    "hotel_reserved_rooms", "Rooms holding at least one dated reservation", ("hotel",),
+    lambda: {(hotel.hotel_id,): len(hotel.occupancy.reservations) for hotel in hotels}
+))
+metrics_registry.register(Gauge(
+    "hotel_selection_cache_lookups_total", "Selection cache lookups by hotel and result", ("hotel", "result"),
+    lambda: {
+        labels: value for hotel in hotels for labels, value in (
+            ((hotel.hotel_id, "hit"), hotel.selection_cache.hits),
+            ((hotel.hotel_id, "miss"), hotel.selection_cache.misses),
+        )
+    }, kind="counter"
+))
+
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
+# Hotel-scoped routes are served under /api/hotels/{hotel_id}, and directly
+# under /api for the default hotel (or ?hotel_id=...)
+hotel_router = APIRouter()
+
+def get_hotel(hotel_id: Optional[str] = None) -> Hotel:
+    hotel = hotels.get(hotel_id)
+    if hotel is None:
+        raise HTTPException(status_code=404, detail=f"Unknown hotel: {hotel_id}")
+    return hotel
+
 # Models
+class Reservation(BaseModel):
+    check_in: str
+    check_out: str
+    booking_id: str
+
 class Room(BaseModel):
     model_config = ConfigDict(extra="ignore")
+    hotel_id: Optional[str] = None
     room_number: int
     floor: int
     position: int
     is_booked: bool = False
     booked_at: Optional[str] = None
+    booking_id: Optional[str] = None
+    reservations: List[Reservation] = []
+
+# Without dates a booking is a walk-in for tonight; with them it reserves
+# the nights [check_in, check_out)
+class StayRequest(BaseModel):
+    check_in: Optional[date] = None
+    check_out: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        if (self.check_in is None) != (self.check_out is None):
+            raise ValueError("check_in and check_out must be given together")
+        if self.check_in is not None and self.check_out <= self.check_in:
+            raise ValueError("check_out must be after check_in")
+        return self
+
+# Cross-floor strategy and objective for this request, e.g. "greedy" at peak
+# times; unset fields use the configured defaults
+class AllocationRequest(StayRequest):
+    strategy: Optional[str] = None
+    objective: Optional[str] = None
 
-class BookingRequest(BaseModel):
+class BookingRequest(AllocationRequest):
     num_rooms: int = Field(..., ge=1, le=5)
 
-class BookingResponse(BaseModel):
+class BatchBookingRequest(AllocationRequest):
+    num_rooms: List[Annotated[int, Field(ge=1, le=5)]] = Field(..., min_length=1, max_length=100)
+
+# Without rooms, cancels the whole booking; with them, releases only those
+class CancelRequest(BaseModel):
+    rooms: Optional[List[int]] = Field(None, min_length=1)
+
+class RandomOccupancyRequest(BaseModel):
+    occupancy: Optional[float] = Field(None, ge=0, le=100)
+    seed: Optional[int] = None
+
+class Booking(BaseModel):
     model_config = ConfigDict(extra="ignore")
     booking_id: str
+    hotel_id: Optional[str] = None
     rooms: List[int]
     total_travel_time: float
     created_at: str
+    check_in: Optional[str] = None
+    check_out: Optional[str] = None
 
-# Room initialization
-def generate_all_rooms():
-    rooms = []
-    # Floors 1-9: 10 rooms each
-    for floor in range(1, 10):
-        for pos in range(1, 11):
-            room_number = floor * 100 + pos
-            rooms.append({
-                "room_number": room_number,
-                "floor": floor,
-                "position": pos,
-                "is_booked": False,
-                "booked_at": None
-            })
+class BookingResponse(Booking):
+    message: str
+
+class BatchBookingResponse(BaseModel):
+    bookings: List[Booking]
+    total_travel_time: float
+    message: str
+
+class RoomList(BaseModel):
+    rooms: List[Room]
+    version: int
+    epoch: str
+
+class CompactRoomList(BaseModel):
+    hotel_id: str
+    room_numbers: List[int]
+    floors: List[int]
+    positions: List[int]
+    booked: str = Field(description="Base64 bitmap; bit i (little-endian) is set when room_numbers[i] is booked")
+    version: int
+    epoch: str
+
+# Plan several parties against one snapshot, trying several placement
+# orders (see party_orders). The first placement of each order goes through
+# the selection cache when the snapshot's fingerprint is given.
+def plan_parties(
+    hotel: Hotel,
+    available_rooms: List[dict],
+    parties: List[int],
+    fingerprint: Optional[tuple] = None,
+    strategy: Optional[str] = None,
+    objective: Optional[str] = None,
+    free_runs: Optional[FreeRunIndex] = None,
+) -> List[tuple[List[int], float]]:
+    if len(available_rooms) < sum(parties):
+        raise ValueError(f"Only {len(available_rooms)} rooms available")
+    strategy, objective = hotel.allocator.resolve(strategy, objective)
     
-    # Floor 10: 7 rooms
-    for pos in range(1, 8):
-        room_number = 1000 + pos
-        rooms.append({
-            "room_number": room_number,
-            "floor": 10,
-            "position": pos,
-            "is_booked": False,
-            "booked_at": None
-        })
-    
-    return rooms
-
-# Travel time calculation
-def calculate_travel_time(room1: dict, room2: dict) -> float:
-    if room1['floor'] == room2['floor']:
-        return abs(room1['position'] - room2['position']) * 1.0
-    else:
-        vertical_time = abs(room1['floor'] - room2['floor']) * 2.0
-        horizontal_time = abs(room1['position'] - room2['position']) * 1.0
-        return vertical_time + horizontal_time
-
-# Calculate total travel time for a combination of rooms
-def calculate_total_travel_time(rooms: List[dict]) -> float:
-    if len(rooms) <= 1:
-        return 0.0
-    
-    total_time = 0.0
-    for i in range(len(rooms) - 1):
-        total_time += calculate_travel_time(rooms[i], rooms[i + 1])
-    
-    return total_time
-
-# Optimal room selection algorithm
-def select_optimal_rooms(available_rooms: List[dict], num_rooms: int) -> tuple[List[dict], float]:
-    if len(available_rooms) < num_rooms:
-        raise ValueError("Not enough available rooms")
-    
-    # Group rooms by floor
-    floors = {}
-    for room in available_rooms:
-        floor = room['floor']
-        if floor not in floors:
-            floors[floor] = []
-        floors[floor].append(room)
-    
-    # Priority 1: Try to find rooms on the same floor
-    for floor, rooms_on_floor in floors.items():
-        if len(rooms_on_floor) >= num_rooms:
-            # Sort by position to get consecutive or nearest rooms
-            rooms_on_floor.sort(key=lambda x: x['position'])
-            selected = rooms_on_floor[:num_rooms]
-            travel_time = calculate_total_travel_time(selected)
-            return selected, travel_time
-    
-    # Priority 2: Find combination across floors with minimum travel time
-    best_combination = None
-    min_travel_time = float('inf')
-    
-    # Limit combinations for performance (if too many rooms available)
-    if len(available_rooms) > 30:
-        # Sample random combinations
-        for _ in range(min(1000, len(list(combinations(range(len(available_rooms)), num_rooms))))):
-            indices = random.sample(range(len(available_rooms)), num_rooms)
-            combo = [available_rooms[i] for i in sorted(indices)]
-            combo.sort(key=lambda x: (x['floor'], x['position']))
-            travel_time = calculate_total_travel_time(combo)
-            
-            if travel_time < min_travel_time:
-                min_travel_time = travel_time
-                best_combination = combo
+    best = None
+    for order in party_orders(parties):
+        plans = place_parties(hotel, available_rooms, parties, order, fingerprint, strategy, objective, free_runs)
+        total = sum(travel_time for _, travel_time in plans)
+        if best is None or total < best[0]:
+            best = (total, plans)
+    return best[1]
+
+# Each party is placed greedily on what the earlier ones left, so the order
+# matters: a large party placed late may have to spread across floors. A
+# small batch tries every order; a larger one tries largest first, smallest
+# first and as given, and keeps the plan with the lowest summed travel time.
+MAX_EXHAUSTIVE_PARTIES = 4
+
+def party_orders(parties: List[int]) -> List[tuple]:
+    indices = range(len(parties))
+    if len(parties) <= MAX_EXHAUSTIVE_PARTIES:
+        candidates = itertools.permutations(indices)
     else:
-        # Check all combinations
-        for combo_indices in combinations(range(len(available_rooms)), num_rooms):
-            combo = [available_rooms[i] for i in combo_indices]
-            combo.sort(key=lambda x: (x['floor'], x['position']))
-            travel_time = calculate_total_travel_time(combo)
-            
-            if travel_time < min_travel_time:
-                min_travel_time = travel_time
-                best_combination = combo
-    
-    return best_combination, min_travel_time
+        candidates = [
+            tuple(sorted(indices, key=lambda i: -parties[i])),
+            tuple(sorted(indices, key=lambda i: parties[i])),
+            tuple(indices),
+        ]
+    # Swapping two equal parties gives the same plan
+    orders = {}
+    for order in candidates:
+        orders.setdefault(tuple(parties[i] for i in order), order)
+    return list(orders.values())
 
-# Initialize rooms on startup
-@app.on_event("startup")
-async def initialize_db():
-    count = await db.rooms.count_documents({})
-    if count == 0:
-        rooms = generate_all_rooms()
-        await db.rooms.insert_many(rooms)
-        logger.info("Initialized 97 rooms in database")
+def place_parties(
+    hotel: Hotel,
+    available_rooms: List[dict],
+    parties: List[int],
+    order: tuple,
+    fingerprint: Optional[tuple],
+    strategy: str,
+    objective: str,
+    free_runs: Optional[FreeRunIndex],
+) -> List[tuple[List[int], float]]:
+    remaining = list(available_rooms)
+    plans = [None] * len(parties)
+    for i in order:
+        key = (fingerprint, parties[i], strategy, objective)
+        cached = hotel.selection_cache.get(key) if fingerprint is not None else None
+        if cached is None:
+            selected, travel_time = hotel.allocator.select_optimal_rooms(remaining, parties[i], strategy, objective, free_runs)
+            cached = (tuple(room['room_number'] for room in selected), travel_time)
+            if fingerprint is not None:
+                hotel.selection_cache.put(key, cached)
+        room_numbers, travel_time = list(cached[0]), cached[1]
+        # Both describe the snapshot, not what is left of it
+        fingerprint = free_runs = None
+        taken = set(room_numbers)
+        remaining = [room for room in remaining if room['room_number'] not in taken]
+        plans[i] = (room_numbers, travel_time)
+    
+    return plans
 
-# API Routes
-@api_router.get("/rooms")
-async def get_rooms():
-    rooms = await db.rooms.find({}, {"_id": 0}).sort("room_number", 1).to_list(100)
-    return {"rooms": rooms}
+# Claim rooms in Mongo only if they are still free. Another worker may have
+# booked some of them since our snapshot, in which case the partial claim is
+# undone and the caller reselects.
+MAX_CLAIM_ATTEMPTS = 5
 
-@api_router.post("/book")
-async def book_rooms(request: BookingRequest):
-    # Get available rooms
-    available_rooms = await db.rooms.find({"is_booked": False}, {"_id": 0}).to_list(100)
+async def claim_rooms(hotel: Hotel, claims: Dict[str, List[int]], timestamp: str, stay: Stay, stamp: dict) -> bool:
+    free = {"reservations": {"$not": {"$elemMatch": {
+        "check_in": {"$lt": stay.check_out},
+        "check_out": {"$gt": stay.check_in},
+    }}}}
+    if stay.current:
+        free["is_booked"] = False
     
-    if len(available_rooms) < request.num_rooms:
-        raise HTTPException(status_code=400, detail=f"Only {len(available_rooms)} rooms available")
+    requests = []
+    for booking_id, room_numbers in claims.items():
+        if stay.reserved:
+            update = {"$push": {"reservations": {
+                "check_in": stay.check_in,
+                "check_out": stay.check_out,
+                "booking_id": booking_id,
+            }}}
+        else:
+            update = {"$set": {"is_booked": True, "booked_at": timestamp, "booking_id": booking_id}}
+        requests.append(UpdateMany(
+            {"hotel_id": hotel.hotel_id, "room_number": {"$in": room_numbers}, **free}, stamped(update, stamp)
+        ))
     
+    result = await db.rooms.bulk_write(requests, ordered=False)
+    if result.modified_count == sum(len(room_numbers) for room_numbers in claims.values()):
+        return True
+    
+    await unclaim_rooms(hotel, claims, stay, stamp)
+    return False
+
+# Undo claims in Mongo. Only the claimed rooms and stay are matched, so a
+# booking that happens to share an ID is left alone.
+async def unclaim_rooms(hotel: Hotel, claims: Dict[str, List[int]], stay: Stay, stamp: dict) -> None:
+    requests = []
+    for booking_id, room_numbers in claims.items():
+        rooms = {"hotel_id": hotel.hotel_id, "room_number": {"$in": room_numbers}}
+        if stay.reserved:
+            reservation = {"check_in": stay.check_in, "check_out": stay.check_out, "booking_id": booking_id}
+            update = {"$pull": {"reservations": reservation}}
+            requests.append(UpdateMany({**rooms, "reservations": reservation}, stamped(update, stamp)))
+        else:
+            update = {"$set": {"is_booked": False, "booked_at": None, "booking_id": None, **stamp}}
+            requests.append(UpdateMany({**rooms, "booking_id": booking_id}, update))
+    await db.rooms.bulk_write(requests, ordered=False)
+
+def hold_rooms(hotel: Hotel, claims: Dict[str, List[int]], timestamp: str, stay: Stay) -> None:
+    if stay.reserved:
+        for booking_id, room_numbers in claims.items():
+            hotel.occupancy.reserve(room_numbers, stay, booking_id)
+    else:
+        booked = []
+        try:
+            for booking_id, room_numbers in claims.items():
+                hotel.occupancy.book(room_numbers, timestamp, booking_id)
+                booked += room_numbers
+        except ValueError:
+            hotel.occupancy.release(booked)
+            raise
+
+# Undo hold_rooms. Holds are never published, but /rooms is served from
+# memory and may have shown them, so the undo is.
+def drop_rooms(hotel: Hotel, claims: Dict[str, List[int]], stay: Stay) -> None:
+    room_numbers = [room for rooms in claims.values() for room in rooms]
+    if stay.reserved:
+        for booking_id, rooms in claims.items():
+            hotel.occupancy.unreserve(rooms, booking_id)
+        changes = [{"room_number": room, "reservations": hotel.occupancy.reservations_of(room)} for room in room_numbers]
+    else:
+        hotel.occupancy.release(room_numbers)
+        changes = [{"room_number": room, "is_booked": False, "booked_at": None, "booking_id": None} for room in room_numbers]
+    hotel.feed.publish(changes)
+
+ROOM_STATE_FIELDS = ("room_number", "is_booked", "booked_at", "booking_id", "reservations")
+
+def room_patch(doc: dict) -> dict:
+    return {field: doc.get(field) for field in ROOM_STATE_FIELDS}
+
+# Let other workers see the room writes made inside this block. The block
+# gets the next shared version as fields to set on every room it writes, so
+# the others fetch just those rooms. When the change is applied to memory
+# too and nobody else wrote in between, this worker has nothing to fetch.
+@asynccontextmanager
+async def shared_write(hotel: Hotel, applied_locally: bool = True) -> AsyncIterator[dict]:
+    if shared_versions is None:
+        yield {}
+        return
+    version = await shared_versions.begin(hotel.hotel_id)
     try:
-        selected_rooms, travel_time = select_optimal_rooms(available_rooms, request.num_rooms)
+        yield {"version": version}
+    finally:
+        await shared_versions.end(hotel.hotel_id, version)
+    if applied_locally and version == hotel.synced_version + 1:
+        hotel.synced_version = version
+
+def stamped(update: dict, stamp: dict) -> dict:
+    if not stamp:
+        return update
+    return {**update, "$set": {**update.get("$set", {}), **stamp}}
+
+def publish_claims(hotel: Hotel, claims: Dict[str, List[int]], timestamp: str, stay: Stay) -> None:
+    if stay.reserved:
+        changes = [
+            {"room_number": room, "reservations": hotel.occupancy.reservations_of(room)}
+            for rooms in claims.values() for room in rooms
+        ]
+    else:
+        changes = [
+            {"room_number": room, "is_booked": True, "booked_at": timestamp, "booking_id": booking_id}
+            for booking_id, rooms in claims.items() for room in rooms
+        ]
+    hotel.feed.publish(changes)
+
+async def reserve_parties(
+    hotel: Hotel,
+    parties: List[int],
+    booking_ids: List[str],
+    stay: Stay,
+    request: Optional[AllocationRequest] = None,
+) -> tuple[List[tuple[List[int], float]], str]:
+    occupancy = hotel.occupancy
+    strategy, objective = (request.strategy, request.objective) if request is not None else (None, None)
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        try:
+            plans = plan_parties(
+                hotel, occupancy.available_rooms(stay), parties, occupancy.fingerprint(stay),
+                strategy, objective, occupancy.free_runs_for(stay)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Update room status
-        room_numbers = [room['room_number'] for room in selected_rooms]
+        # Planning and the in-memory update run without yielding, so no
+        # other request in this process can pick the same rooms
+        claims = dict(zip(booking_ids, (rooms for rooms, _ in plans)))
         timestamp = datetime.now(timezone.utc).isoformat()
+        hold_rooms(hotel, claims, timestamp, stay)
         
-        await db.rooms.update_many(
-            {"room_number": {"$in": room_numbers}},
-            {"$set": {"is_booked": True, "booked_at": timestamp}}
+        async with shared_write(hotel) as stamp:
+            try:
+                claimed = await claim_rooms(hotel, claims, timestamp, stay, stamp)
+            except Exception:
+                drop_rooms(hotel, claims, stay)
+                raise
+            
+            if claimed:
+                # Publish before any other await, so the feed keeps the
+                # order in which memory was updated
+                publish_claims(hotel, claims, timestamp, stay)
+                return plans, timestamp
+            
+            # Lost a race with another worker: refresh these rooms and retry
+            drop_rooms(hotel, claims, stay)
+            room_numbers = [room for rooms in claims.values() for room in rooms]
+            room_docs = await db.rooms.find(
+                {"hotel_id": hotel.hotel_id, "room_number": {"$in": room_numbers}}, {"_id": 0}
+            ).to_list(None)
+            hotel.feed.publish([room_patch(doc) for doc in occupancy.sync(room_docs)])
+    
+    raise HTTPException(status_code=409, detail="Rooms were taken concurrently, please retry")
+
+# Save the history of bookings whose rooms were just claimed. If that fails
+# the claims are undone, so no room stays held by a booking without a record.
+async def record_bookings(hotel: Hotel, bookings: List[Booking], stay: Stay) -> None:
+    try:
+        await db.bookings.insert_many([booking.model_dump() for booking in bookings])
+    except Exception as e:
+        claims = {booking.booking_id: booking.rooms for booking in bookings}
+        drop_rooms(hotel, claims, stay)
+        async with shared_write(hotel) as stamp:
+            await unclaim_rooms(hotel, claims, stay, stamp)
+        # The bookings before the failing one were inserted
+        inserted = e.details.get("nInserted", 0) if isinstance(e, BulkWriteError) else 0
+        if inserted:
+            await db.bookings.delete_many(
+                {"booking_id": {"$in": [booking.booking_id for booking in bookings[:inserted]]}}
+            )
+        raise
+
+def resolve_stay(request: StayRequest) -> Stay:
+    try:
+        return Stay.resolve(request.check_in, request.check_out, datetime.now(timezone.utc).date())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Indexes backing the queries below: room lookups and sorts by number,
+# claims filtered on is_booked/booking_id, and history sorted by time, all
+# within one hotel. Room numbers repeat across hotels, so the single-hotel
+# indexes they replace are dropped.
+INDEXES = {
+    "rooms": [
+        ([("hotel_id", 1), ("room_number", 1)], {"unique": True}),
+        ([("hotel_id", 1), ("is_booked", 1)], {}),
+        ([("booking_id", 1)], {}),
+        ([("reservations.booking_id", 1)], {}),
+        ([("hotel_id", 1), ("version", 1)], {}),
+    ],
+    "bookings": [
+        ([("booking_id", 1)], {"unique": True}),
+        ([("hotel_id", 1), ("created_at", -1), ("booking_id", -1)], {}),
+    ],
+    "idempotency_keys": [
+        ([("hotel_id", 1), ("key", 1)], {"unique": True}),
+        ([("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+}
+OBSOLETE_INDEXES = {
+    "rooms": ["room_number_1", "is_booked_1"],
+    "bookings": ["created_at_-1_booking_id_-1"],
+}
+
+async def ensure_indexes():
+    for collection, names in OBSOLETE_INDEXES.items():
+        info = await db[collection].index_information()
+        for name in names:
+            if name in info:
+                try:
+                    await db[collection].drop_index(name)
+                    logger.info(f"Dropped obsolete index {name} on {collection}")
+                except OperationFailure as e:
+                    # Usually another worker dropped it first
+                    logger.warning(f"Could not drop index {name} on {collection}: {e}")
+    
+    for collection, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                await db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                logger.error(f"Could not create index {keys} on {collection}: {e}")
+        
+        info = await db[collection].index_information()
+        for keys, options in indexes:
+            name = "_".join(f"{field}_{direction}" for field, direction in keys)
+            if name not in info:
+                logger.warning(f"Index {name} is missing on {collection}")
+            elif options.get("unique") and not info[name].get("unique"):
+                logger.warning(f"Index {name} on {collection} exists but is not unique")
+        logger.info(f"Indexes on {collection}: {', '.join(sorted(info))}")
+
+# Initialize rooms on startup. Documents from before multi-hotel support
+# have no hotel_id and belong to the default hotel.
+@app.on_event("startup")
+async def initialize_db():
+    await ensure_indexes()
+    
+    for collection in ("rooms", "bookings"):
+        result = await db[collection].update_many(
+            {"hotel_id": {"$exists": False}}, {"$set": {"hotel_id": hotels.default_id}}
         )
+        if result.modified_count:
+            logger.info(f"Assigned {result.modified_count} {collection} to hotel {hotels.default_id}")
+    
+    for hotel in hotels:
+        if shared_versions is not None:
+            # Read the shared version before the rooms, so the loaded state
+            # is at least as new as the settled version. Writes still open
+            # may land later, so their rooms are fetched on the first sync.
+            _, hotel.synced_version = await shared_versions.register(hotel.hotel_id)
         
-        # Save booking history
-        booking_id = f"BK{int(datetime.now(timezone.utc).timestamp() * 1000)}"
-        booking_doc = {
-            "booking_id": booking_id,
-            "rooms": room_numbers,
-            "total_travel_time": travel_time,
-            "created_at": timestamp
-        }
-        await db.bookings.insert_one(booking_doc)
+        count = await db.rooms.count_documents({"hotel_id": hotel.hotel_id})
+        if count == 0:
+            rooms = hotel.generate_rooms()
+            try:
+                await db.rooms.insert_many(rooms, ordered=False)
+                logger.info(f"Initialized {len(rooms)} rooms for hotel {hotel.hotel_id}")
+            except BulkWriteError as e:
+                # Workers starting together race to seed; the unique index
+                # keeps one copy of each room
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                logger.info(f"Rooms for hotel {hotel.hotel_id} were initialized by another worker")
+        elif count != hotel.topology.total_rooms:
+            logger.warning(f"Database holds {count} rooms for hotel {hotel.hotel_id} but its topology defines {hotel.topology.total_rooms}")
         
-        return {
-            "booking_id": booking_id,
-            "rooms": room_numbers,
-            "total_travel_time": travel_time,
-            "created_at": timestamp,
-            "message": "Rooms booked successfully"
-        }
+        room_docs = await db.rooms.find({"hotel_id": hotel.hotel_id}, {"_id": 0}).to_list(None)
+        hotel.occupancy.load(room_docs)
+        logger.info(f"Loaded occupancy for hotel {hotel.hotel_id}: {hotel.occupancy.booked_count}/{hotel.occupancy.total_rooms} rooms booked")
     
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    for hotel in hotels:
+        await check_out_walk_ins(hotel)
+    app.state.check_out = asyncio.create_task(check_out_periodically())
+    if shared_versions is not None:
+        app.state.occupancy_follower = asyncio.create_task(follow_shared_occupancy())
+    if COMPACTION_INTERVAL_SECONDS > 0:
+        app.state.compaction = asyncio.create_task(compact_periodically())
+
+# Walk-ins cover the night they were booked, so they are checked out once the
+# date (UTC) rolls over; a room reserved from tomorrow is then free when the
+# guest arrives. Mongo is released by the same filter, so every worker may
+# run this.
+CHECK_OUT_INTERVAL_SECONDS = 60
+
+async def check_out_walk_ins(hotel: Hotel) -> None:
+    today = datetime.now(timezone.utc).date().isoformat()
+    expired = hotel.occupancy.booked_before(today)
+    if not expired:
+        return
+    hotel.occupancy.release(expired)
+    hotel.feed.publish([
+        {"room_number": room, "is_booked": False, "booked_at": None, "booking_id": None}
+        for room in expired
+    ])
+    async with shared_write(hotel) as stamp:
+        result = await db.rooms.update_many(
+            {"hotel_id": hotel.hotel_id, "is_booked": True, "booked_at": {"$lt": today}},
+            {"$set": {"is_booked": False, "booked_at": None, "booking_id": None, **stamp}}
+        )
+    logger.info(f"Checked out {result.modified_count} walk-in rooms for hotel {hotel.hotel_id}")
+
+async def check_out_periodically():
+    while True:
+        await asyncio.sleep(CHECK_OUT_INTERVAL_SECONDS)
+        for hotel in hotels:
+            try:
+                await check_out_walk_ins(hotel)
+            except Exception as e:
+                logger.warning(f"Could not check out walk-ins for hotel {hotel.hotel_id}: {e}")
 
-@api_router.post("/reset")
-async def reset_bookings():
-    result = await db.rooms.update_many(
-        {},
-        {"$set": {"is_booked": False, "booked_at": None}}
+# Fetch the rooms written since the shared version this worker last synced,
+# publishing the ones that changed to local event subscribers. Writes still
+# open may land later with older versions, so the synced version only moves
+# up to the one below the oldest open write, and the next poll fetches the
+# rooms after it again.
+async def sync_shared_occupancy():
+    versions = await shared_versions.current()
+    for hotel in hotels:
+        version, settled = versions.get(hotel.hotel_id, (0, 0))
+        if version <= hotel.synced_version:
+            continue
+        room_docs = await db.rooms.find(
+            {"hotel_id": hotel.hotel_id, "version": {"$gt": hotel.synced_version}}, {"_id": 0}
+        ).to_list(None)
+        hotel.feed.publish([room_patch(doc) for doc in hotel.occupancy.sync(room_docs)])
+        hotel.synced_version = max(hotel.synced_version, settled)
+
+async def follow_shared_occupancy():
+    while True:
+        await asyncio.sleep(OCCUPANCY_SYNC_SECONDS)
+        try:
+            await sync_shared_occupancy()
+        except Exception as e:
+            logger.warning(f"Could not sync shared occupancy: {e}")
+
+# API Routes
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+@api_router.get("/hotels")
+async def get_hotels():
+    return {
+        "default": hotels.default_id,
+        "hotels": [
+            {
+                "hotel_id": hotel.hotel_id,
+                "floors": hotel.topology.floors,
+                "total_rooms": hotel.occupancy.total_rooms,
+                "booked_rooms": hotel.occupancy.booked_count,
+            }
+            for hotel in hotels
+        ]
+    }
+
+# Room state is served from memory, where every published change is already
+# applied, so the payload matches its feed version exactly. It is encoded
+# once per version and format, and the same version makes the ETag, so
+# revalidation is answered without encoding anything. ?format=compact
+# trades per-room documents for arrays and a booked bitmap.
+@hotel_router.get("/rooms", response_model=Union[RoomList, CompactRoomList])
+async def get_rooms(request: Request, format: Literal["full", "compact"] = "full", hotel: Hotel = Depends(get_hotel)):
+    version = hotel.feed.version
+    suffix = "" if format == "full" else f"-{format}"
+    etag = f'"rooms-{hotel.hotel_id}-{hotel.feed.epoch}-{version}{suffix}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    return Response(hotel.room_payload(format), media_type="application/json", headers=headers)
+
+# Server-sent events with room patches. Event ids are "{epoch}:{version}",
+# so a reconnect resumes from Last-Event-ID. When the changes a client missed
+# are no longer buffered, or were numbered by another worker, the stream
+# starts with a "snapshot" of the full room list from this worker instead,
+# and patches follow from its version.
+SSE_KEEPALIVE_SECONDS = 15
+
+def sse_message(event: str, data, event_id: Optional[str] = None) -> str:
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    body = data.decode() if isinstance(data, bytes) else json.dumps(data)
+    return f"{id_line}event: {event}\ndata: {body}\n\n"
+
+@hotel_router.get("/rooms/events")
+async def room_events(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    epoch: Optional[str] = None,
+    hotel: Hotel = Depends(get_hotel),
+):
+    last_event_id = request.headers.get("last-event-id", "")
+    if ":" in last_event_id:
+        epoch, _, last_version = last_event_id.rpartition(":")
+        since = int(last_version) if last_version.isdigit() else None
+    elif last_event_id.isdigit():
+        since = int(last_event_id)
+    
+    room_feed = hotel.feed
+    if epoch is not None and epoch != room_feed.epoch:
+        since = None
+    
+    def event_id(version: int) -> str:
+        return f"{room_feed.epoch}:{version}"
+    
+    async def stream():
+        subscription = room_feed.subscribe()
+        try:
+            backlog = room_feed.replay(since) if since is not None else None
+            if backlog is None:
+                sent = room_feed.version
+                yield sse_message("snapshot", hotel.room_payload(), event_id(sent))
+            else:
+                sent = since
+                for version, changes in backlog:
+                    yield sse_message("rooms", changes, event_id(version))
+                    sent = version
+            
+            while True:
+                try:
+                    version, changes = await asyncio.wait_for(subscription.queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscription.overflowed:
+                    # Patches were dropped: start over from a new snapshot
+                    room_feed.unsubscribe(subscription)
+                    subscription = room_feed.subscribe()
+                    sent = room_feed.version
+                    yield sse_message("snapshot", hotel.room_payload(), event_id(sent))
+                    continue
+                if version > sent:
+                    yield sse_message("rooms", changes, event_id(version))
+                    sent = version
+        finally:
+            room_feed.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Idempotency-Key support for booking requests. The key is claimed in Mongo
+# before any room is, so a retry on any worker either replays the stored
+# response or, while the first attempt is still running, gets a 409. An
+# attempt that fails releases the key; one that stalls for longer than
+# IDEMPOTENCY_LOCK_SECONDS (e.g. its worker died) can be taken over. Recent
+# responses are kept in memory too, so most replays skip Mongo entirely.
+IDEMPOTENCY_TTL_SECONDS = float(os.environ.get('IDEMPOTENCY_TTL_SECONDS') or 24 * 3600)
+IDEMPOTENCY_LOCK_SECONDS = 30
+idempotent_responses = TTLCache(int(os.environ.get('IDEMPOTENCY_CACHE_SIZE') or 10000), IDEMPOTENCY_TTL_SECONDS)
+
+def replay_response(stored: dict, body: dict) -> JSONResponse:
+    if stored["request"] != body:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    return JSONResponse(stored["response"], headers={"Idempotent-Replayed": "true"})
+
+# Returns the replayed response for a known key, or None once this request
+# holds the key and should run
+async def claim_idempotency_key(hotel: Hotel, key: str, body: dict) -> Optional[JSONResponse]:
+    cached = idempotent_responses.get((hotel.hotel_id, key))
+    if cached is not None:
+        return replay_response(cached, body)
+    
+    selector = {"hotel_id": hotel.hotel_id, "key": key}
+    for _ in range(2):
+        now = datetime.now(timezone.utc)
+        try:
+            await db.idempotency_keys.insert_one({
+                **selector,
+                "request": body,
+                "response": None,
+                "locked_until": now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+                "expires_at": now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS)
+            })
+            return None
+        except DuplicateKeyError:
+            stored = await db.idempotency_keys.find_one(selector, {"_id": 0})
+        if stored is None:
+            # Released or expired since the insert failed: try again
+            continue
+        if stored["response"] is not None:
+            idempotent_responses.put((hotel.hotel_id, key), stored)
+            return replay_response(stored, body)
+        if stored["request"] != body:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        result = await db.idempotency_keys.update_one(
+            {**selector, "response": None, "locked_until": {"$lt": now}},
+            {"$set": {"locked_until": now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)}}
+        )
+        if result.modified_count:
+            return None
+        break
+    raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+
+# Responses are serialized by pydantic-core straight to JSON, skipping
+# FastAPI's re-validation of the returned model against response_model
+def model_response(model: BaseModel) -> Response:
+    return Response(model.model_dump_json(), media_type="application/json")
+
+async def run_idempotent(hotel: Hotel, key: Optional[str], request: BaseModel, handler: Callable[[], Awaitable[BaseModel]]) -> Response:
+    if key is None:
+        return model_response(await handler())
+    body = request.model_dump(mode="json")
+    replay = await claim_idempotency_key(hotel, key, body)
+    if replay is not None:
+        return replay
+    
+    selector = {"hotel_id": hotel.hotel_id, "key": key}
+    try:
+        response = await handler()
+    except Exception:
+        await db.idempotency_keys.delete_one({**selector, "response": None})
+        raise
+    stored = response.model_dump(mode="json")
+    await db.idempotency_keys.update_one(selector, {"$set": {"response": stored}, "$unset": {"locked_until": ""}})
+    idempotent_responses.put((hotel.hotel_id, key), {"request": body, "response": stored})
+    return model_response(response)
+
+@hotel_router.post("/book", response_model=BookingResponse)
+async def book_rooms(
+    request: BookingRequest,
+    hotel: Hotel = Depends(get_hotel),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+):
+    return await run_idempotent(hotel, idempotency_key, request, lambda: create_booking(hotel, request))
+
+async def create_booking(hotel: Hotel, request: BookingRequest) -> BookingResponse:
+    stay = resolve_stay(request)
+    booking_id = new_booking_id()
+    [(room_numbers, travel_time)], timestamp = await reserve_parties(hotel, [request.num_rooms], [booking_id], stay, request)
+    
+    # Save booking history
+    check_in, check_out = (stay.check_in, stay.check_out) if stay.reserved else (None, None)
+    booking = Booking(
+        booking_id=booking_id,
+        hotel_id=hotel.hotel_id,
+        rooms=room_numbers,
+        total_travel_time=travel_time,
+        created_at=timestamp,
+        check_in=check_in,
+        check_out=check_out
     )
+    await record_bookings(hotel, [booking], stay)
+    
+    return BookingResponse(**booking.model_dump(), message="Rooms booked successfully")
+
+@hotel_router.post("/book/batch", response_model=BatchBookingResponse)
+async def book_rooms_batch(
+    request: BatchBookingRequest,
+    hotel: Hotel = Depends(get_hotel),
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+):
+    return await run_idempotent(hotel, idempotency_key, request, lambda: create_bookings(hotel, request))
+
+async def create_bookings(hotel: Hotel, request: BatchBookingRequest) -> BatchBookingResponse:
+    stay = resolve_stay(request)
+    booking_ids = [new_booking_id() for _ in request.num_rooms]
+    plans, timestamp = await reserve_parties(hotel, request.num_rooms, booking_ids, stay, request)
+    
+    # Save booking history
+    check_in, check_out = (stay.check_in, stay.check_out) if stay.reserved else (None, None)
+    bookings = [
+        Booking(
+            booking_id=booking_id,
+            hotel_id=hotel.hotel_id,
+            rooms=room_numbers,
+            total_travel_time=travel_time,
+            created_at=timestamp,
+            check_in=check_in,
+            check_out=check_out
+        )
+        for booking_id, (room_numbers, travel_time) in zip(booking_ids, plans)
+    ]
+    await record_bookings(hotel, bookings, stay)
+    
+    return BatchBookingResponse(
+        bookings=bookings,
+        total_travel_time=sum(travel_time for _, travel_time in plans),
+        message=f"{len(bookings)} bookings created successfully"
+    )
+
+@hotel_router.post("/reset")
+async def reset_bookings(hotel: Hotel = Depends(get_hotel)):
+    released = hotel.occupancy.release_all()
+    changes = [
+        {"room_number": room, "is_booked": False, "booked_at": None, "booking_id": None}
+        for room in released
+    ]
+    hotel.feed.publish(changes)
+    # Only rooms that are actually booked change state
+    async with shared_write(hotel) as stamp:
+        result = await db.rooms.update_many(
+            {"hotel_id": hotel.hotel_id, "is_booked": True},
+            {"$set": {"is_booked": False, "booked_at": None, "booking_id": None, **stamp}}
+        )
     
     return {
         "message": "All bookings cleared",
         "rooms_reset": result.modified_count
     }
 
-@api_router.post("/random")
-async def random_occupancy():
-    all_rooms = await db.rooms.find({}, {"_id": 0}).to_list(100)
-    
-    # Reset all first
-    await db.rooms.update_many({}, {"$set": {"is_booked": False, "booked_at": None}})
+@hotel_router.post("/random")
+async def random_occupancy(request: Optional[RandomOccupancyRequest] = None, hotel: Hotel = Depends(get_hotel)):
+    request = request or RandomOccupancyRequest()
+    occupancy = hotel.occupancy
+    rng = random.Random(request.seed)
     
-    # Randomly book 30-60% of rooms
-    num_to_book = random.randint(30, 58)
-    rooms_to_book = random.sample(all_rooms, num_to_book)
-    room_numbers = [room['room_number'] for room in rooms_to_book]
+    # Book a random 30-60% of rooms (or the requested share), skipping any
+    # reserved for tonight
+    tonight = Stay.resolve(None, None, datetime.now(timezone.utc).date())._replace(current=False)
+    candidates = [room['room_number'] for room in occupancy.available_rooms(tonight)]
+    if request.occupancy is not None:
+        num_to_book = round(occupancy.total_rooms * request.occupancy / 100)
+    else:
+        num_to_book = rng.randint(round(occupancy.total_rooms * 0.3), round(occupancy.total_rooms * 0.6))
+    room_numbers = rng.sample(candidates, min(num_to_book, len(candidates)))
     
+    # Apply only the difference from the current state, in one round trip.
+    # The filters are on Mongo's state, so rooms another worker changed since
+    # this one last synced still end up as requested.
+    target = set(room_numbers)
+    booked = set(occupancy.booked_at)
+    to_release = sorted(booked - target)
+    to_book = sorted(target - booked)
     timestamp = datetime.now(timezone.utc).isoformat()
-    await db.rooms.update_many(
-        {"room_number": {"$in": room_numbers}},
-        {"$set": {"is_booked": True, "booked_at": timestamp}}
+    occupancy.release(to_release)
+    occupancy.book(to_book, timestamp)
+    hotel.feed.publish(
+        [{"room_number": room, "is_booked": False, "booked_at": None, "booking_id": None} for room in to_release]
+        + [{"room_number": room, "is_booked": True, "booked_at": timestamp, "booking_id": None} for room in to_book]
     )
     
+    async with shared_write(hotel, applied_locally=False) as stamp:
+        requests = [UpdateMany(
+            {"hotel_id": hotel.hotel_id, "is_booked": True, "room_number": {"$nin": sorted(target)}},
+            {"$set": {"is_booked": False, "booked_at": None, "booking_id": None, **stamp}}
+        )]
+        if to_book:
+            requests.append(UpdateMany(
+                {"hotel_id": hotel.hotel_id, "is_booked": False, "room_number": {"$in": to_book}},
+                {"$set": {"is_booked": True, "booked_at": timestamp, "booking_id": None, **stamp}}
+            ))
+        await db.rooms.bulk_write(requests, ordered=False)
+    
     return {
         "message": "Random occupancy generated",
-        "rooms_booked": len(room_numbers)
+        "rooms_booked": len(room_numbers),
+        "rooms_changed": len(to_release) + len(to_book)
     }
 
-@api_router.get("/bookings")
-async def get_bookings():
-    bookings = await db.bookings.find({}, {"_id": 0}).sort("created_at", -1).limit(50).to_list(50)
-    return {"bookings": bookings}
+@hotel_router.get("/selection-cache")
+async def get_selection_cache_stats(hotel: Hotel = Depends(get_hotel)):
+    return hotel.selection_cache.stats()
+
+# Cancel a booking or release part of it. Rooms are freed in one update whose
+# filter only matches rooms still held by this booking, so a room that was
+# reset or rebooked since is left alone.
+@hotel_router.post("/bookings/{booking_id}/cancel")
+async def cancel_booking(booking_id: str, request: Optional[CancelRequest] = None, hotel: Hotel = Depends(get_hotel)):
+    request = request or CancelRequest()
+    booking = await db.bookings.find_one({"hotel_id": hotel.hotel_id, "booking_id": booking_id}, {"_id": 0})
+    if booking is None:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    
+    held = [room for room in booking["rooms"] if room not in booking.get("released_rooms", [])]
+    if not held:
+        raise HTTPException(status_code=409, detail="Booking is already cancelled")
+    to_release = held if request.rooms is None else sorted(set(request.rooms))
+    not_held = sorted(set(to_release) - set(held))
+    if not_held:
+        raise HTTPException(status_code=400, detail=f"Rooms not held by this booking: {not_held}")
+    
+    occupancy = hotel.occupancy
+    async with shared_write(hotel) as stamp:
+        if booking.get("check_in") is not None:
+            expected = [
+                room for room in to_release
+                if any(reservation["booking_id"] == booking_id for reservation in occupancy.reservations_of(room))
+            ]
+            occupancy.unreserve(to_release, booking_id)
+            hotel.feed.publish([{"room_number": room, "reservations": occupancy.reservations_of(room)} for room in expected])
+            result = await db.rooms.update_many(
+                {"hotel_id": hotel.hotel_id, "room_number": {"$in": to_release}, "reservations.booking_id": booking_id},
+                stamped({"$pull": {"reservations": {"booking_id": booking_id}}}, stamp)
+            )
+        else:
+            expected = [room for room in to_release if occupancy.booking_ids.get(room) == booking_id]
+            occupancy.release(expected)
+            hotel.feed.publish([
+                {"room_number": room, "is_booked": False, "booked_at": None, "booking_id": None}
+                for room in expected
+            ])
+            result = await db.rooms.update_many(
+                {"hotel_id": hotel.hotel_id, "room_number": {"$in": to_release}, "booking_id": booking_id},
+                {"$set": {"is_booked": False, "booked_at": None, "booking_id": None, **stamp}}
+            )
+        
+        if result.modified_count != len(expected):
+            # Memory was stale (another worker changed these rooms): reload them
+            room_docs = await db.rooms.find(
+                {"hotel_id": hotel.hotel_id, "room_number": {"$in": to_release}}, {"_id": 0}
+            ).to_list(None)
+            hotel.feed.publish([room_patch(doc) for doc in occupancy.sync(room_docs)])
+    
+    booking = await db.bookings.find_one_and_update(
+        {"hotel_id": hotel.hotel_id, "booking_id": booking_id},
+        {"$addToSet": {"released_rooms": {"$each": to_release}}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    cancelled = set(booking["rooms"]) <= set(booking["released_rooms"])
+    if cancelled and not booking.get("cancelled_at"):
+        await db.bookings.update_one(
+            {"hotel_id": hotel.hotel_id, "booking_id": booking_id},
+            {"$set": {"cancelled_at": datetime.now(timezone.utc).isoformat()}}
+        )
+    
+    return {
+        "booking_id": booking_id,
+        "released_rooms": to_release,
+        "rooms_freed": result.modified_count,
+        "cancelled": cancelled,
+        "message": "Booking cancelled" if cancelled else "Rooms released"
+    }
+
+# Room moves that would rebuild contiguous same-floor free blocks, so later
+# parties fit on one floor. Plans are proposals only; they are recomputed on
+# request once occupancy has changed, and kept warm by a background pass
+# when COMPACTION_INTERVAL_SECONDS is set.
+COMPACTION_INTERVAL_SECONDS = float(os.environ.get('COMPACTION_INTERVAL_SECONDS') or 0)
+COMPACTION_MAX_MOVES = 10
+
+def plan_compaction(hotel: Hotel) -> dict:
+    tonight = Stay.resolve(None, None, datetime.now(timezone.utc).date())
+    planner = CompactionPlanner(hotel.occupancy, hotel.occupancy.available_rooms(tonight))
+    hotel.compaction = {
+        "version": hotel.feed.version,
+        "planned_at": datetime.now(timezone.utc).isoformat(),
+        **planner.plan(COMPACTION_MAX_MOVES)
+    }
+    return hotel.compaction
+
+async def compact_periodically():
+    while True:
+        await asyncio.sleep(COMPACTION_INTERVAL_SECONDS)
+        for hotel in hotels:
+            if hotel.compaction is not None and hotel.compaction["version"] == hotel.feed.version:
+                continue
+            plan = plan_compaction(hotel)
+            if plan["moves"]:
+                logger.info(f"Compaction for hotel {hotel.hotel_id}: {len(plan['moves'])} moves would recover {plan['stranded_rooms_before'] - plan['stranded_rooms_after']} stranded rooms")
+
+@hotel_router.get("/compaction")
+async def get_compaction_plan(hotel: Hotel = Depends(get_hotel)):
+    if hotel.compaction is None or hotel.compaction["version"] != hotel.feed.version:
+        return plan_compaction(hotel)
+    return hotel.compaction
+
+# Booking history is paged by keyset on (created_at, booking_id), newest
+# first. The cursor is the key of the last booking on the previous page.
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(booking: dict) -> str:
+    key = json.dumps([booking["created_at"], booking["booking_id"]])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        created_at, booking_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), str(booking_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def as_utc_iso(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
+
+@hotel_router.get("/bookings")
+async def get_bookings(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    room: Optional[int] = None,
+    num_rooms: Optional[int] = Query(None, ge=1),
+    hotel: Hotel = Depends(get_hotel),
+):
+    filters = [{"hotel_id": hotel.hotel_id}]
+    if created_from is not None:
+        filters.append({"created_at": {"$gte": as_utc_iso(created_from)}})
+    if created_to is not None:
+        filters.append({"created_at": {"$lt": as_utc_iso(created_to)}})
+    if room is not None:
+        filters.append({"rooms": room})
+    if num_rooms is not None:
+        filters.append({"rooms": {"$size": num_rooms}})
+    if cursor is not None:
+        created_at, booking_id = decode_cursor(cursor)
+        filters.append({"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "booking_id": {"$lt": booking_id}},
+        ]})
+    
+    query = {"$and": filters}
+    bookings = await db.bookings.find(query, {"_id": 0}).sort(
+        [("created_at", -1), ("booking_id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        next_cursor = encode_cursor(bookings[-1])
+    
+    return {"bookings": bookings, "next_cursor": next_cursor}
+
+# Exports stream straight off the Motor cursor in fixed-size chunks, so memory
+# stays flat however large the collection gets
+EXPORT_FIELDS = {
+    "rooms": ["room_number", "floor", "position", "is_booked", "booked_at", "booking_id", "reservations"],
+    "bookings": ["booking_id", "rooms", "total_travel_time", "created_at", "check_in", "check_out", "released_rooms", "cancelled_at"],
+}
+EXPORT_SORT = {
+    "rooms": [("room_number", 1)],
+    "bookings": [("created_at", 1), ("booking_id", 1)],
+}
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# CSV cells: room lists are ;-separated, lists of documents (reservations)
+# are JSON-encoded
+def csv_value(value):
+    if not isinstance(value, list):
+        return value
+    if any(isinstance(item, dict) for item in value):
+        return json.dumps(value)
+    return ";".join(map(str, value))
+
+async def export_chunks(hotel: Hotel, collection: str, format: str) -> AsyncIterator[str]:
+    fields = EXPORT_FIELDS[collection]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if format == "csv":
+        writer.writerow(fields)
+    
+    cursor = db[collection].find({"hotel_id": hotel.hotel_id}, {"_id": 0}).sort(EXPORT_SORT[collection]).batch_size(EXPORT_BATCH_SIZE)
+    async for doc in cursor:
+        if format == "csv":
+            row = [doc.get(field) for field in fields]
+            writer.writerow([csv_value(value) for value in row])
+        else:
+            buffer.write(json.dumps({field: doc.get(field) for field in fields}))
+            buffer.write("\n")
+        
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@hotel_router.get("/export/{collection}")
+async def export_collection(
+    collection: Literal["rooms", "bookings"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    hotel: Hotel = Depends(get_hotel),
+):
+    return StreamingResponse(
+        export_chunks(hotel, collection, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{hotel.hotel_id}-{collection}.{format}"'}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
+api_router.include_router(hotel_router, prefix="/hotels/{hotel_id}")
+api_router.include_router(hotel_router)
 app.include_router(api_router)
 
 app.add_middleware(
@@ -243,7 +1182,9 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(MetricsMiddleware, histogram=REQUEST_SECONDS)
 
 logging.basicConfig(
     level=logging.INFO,
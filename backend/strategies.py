@@ -0,0 +1,229 @@
+"""Cross-floor selection strategies and the objectives they minimise.
+
+A strategy picks ``num_rooms`` rooms from the free rooms of a hotel when no
+single floor can hold the party. Strategies are registered by name in
+``STRATEGIES`` and objectives in ``OBJECTIVES``, so either can be chosen per
+request or per deployment:
+
+- ``exact``: the optimum. Dynamic programming for ``path``, a sort for
+  ``lift``; ``spread`` has no exact solver.
+- ``greedy``: nearest-neighbour growth from a few seed rooms.
+- ``beam``: keeps the best partial selections at every step.
+- ``anytime``: greedy first, then ever wider beams until the latency
+  budget runs out.
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from topology import TravelMatrix
+
+
+def walk_order(rooms: List[dict]) -> List[dict]:
+    return sorted(rooms, key=lambda room: (room['floor'], room['position']))
+
+
+def travel_between(travel_matrix: TravelMatrix, room1: dict, room2: dict) -> float:
+    return float(
+        travel_matrix.floor_cost[room1['floor'], room2['floor']]
+        + travel_matrix.position_cost[room1['position'], room2['position']]
+    )
+
+
+class Objective(ABC):
+    """Cost of a selection, lower is better.
+
+    ``step`` scores each candidate room for growing a partial selection,
+    given its nearest and farthest travel time to the rooms already chosen,
+    its travel time from the lift and the partial selection's cost.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def cost(self, travel_matrix: TravelMatrix, rooms: List[dict]) -> float:
+        ...
+
+    @abstractmethod
+    def step(self, near: np.ndarray, far: np.ndarray, lift: np.ndarray, current: float) -> np.ndarray:
+        ...
+
+
+class PathObjective(Objective):
+    """Travel time walking the rooms in (floor, position) order."""
+
+    name = "path"
+
+    def cost(self, travel_matrix, rooms):
+        ordered = walk_order(rooms)
+        return sum(travel_between(travel_matrix, a, b) for a, b in zip(ordered, ordered[1:]))
+
+    def step(self, near, far, lift, current):
+        return near
+
+
+class SpreadObjective(Objective):
+    """Largest travel time between any two of the rooms."""
+
+    name = "spread"
+
+    def cost(self, travel_matrix, rooms):
+        return max(
+            (travel_between(travel_matrix, a, b) for i, a in enumerate(rooms) for b in rooms[i + 1:]),
+            default=0.0,
+        )
+
+    def step(self, near, far, lift, current):
+        return np.maximum(far, current)
+
+
+class LiftObjective(Objective):
+    """Total travel time from the lift landing to each room."""
+
+    name = "lift"
+
+    def cost(self, travel_matrix, rooms):
+        return sum(float(travel_matrix.position_cost[0, room['position']]) for room in rooms)
+
+    def step(self, near, far, lift, current):
+        return lift
+
+
+OBJECTIVES: Dict[str, Objective] = {objective.name: objective for objective in (PathObjective(), SpreadObjective(), LiftObjective())}
+
+# A partial selection: chosen indices, their cost, and the nearest/farthest
+# travel time from every candidate to them
+State = Tuple[Tuple[int, ...], float, np.ndarray, np.ndarray]
+
+
+class Search:
+    """Free rooms as arrays, for growing selections one room at a time."""
+
+    def __init__(self, travel_matrix: TravelMatrix, rooms: List[dict], objective: Objective):
+        self.travel_matrix = travel_matrix
+        self.rooms = walk_order(rooms)
+        self.objective = objective
+        self.floors = np.array([room['floor'] for room in self.rooms], dtype=np.intp)
+        self.positions = np.array([room['position'] for room in self.rooms], dtype=np.intp)
+        self.lift = travel_matrix.position_cost[0, self.positions]
+
+    def seeds(self, count: int) -> List[int]:
+        """Up to ``count`` starting rooms spread evenly over the hotel."""
+        return sorted(set(np.linspace(0, len(self.rooms) - 1, min(count, len(self.rooms))).astype(int).tolist()))
+
+    def distances(self, index: int) -> np.ndarray:
+        return (
+            self.travel_matrix.floor_cost[self.floors[index], self.floors]
+            + self.travel_matrix.position_cost[self.positions[index], self.positions]
+        )
+
+    def cost(self, indices) -> float:
+        return self.objective.cost(self.travel_matrix, [self.rooms[i] for i in indices])
+
+    def start(self, index: int) -> State:
+        distances = self.distances(index)
+        return (index,), self.cost((index,)), distances, distances
+
+    def extend(self, state: State, width: int) -> List[State]:
+        """The ``width`` best one-room extensions of a partial selection."""
+        chosen, cost, near, far = state
+        scores = np.array(self.objective.step(near, far, self.lift, cost), dtype=float)
+        scores[list(chosen)] = np.inf
+        width = min(width, len(self.rooms) - len(chosen))
+        candidates = np.argpartition(scores, width - 1)[:width] if width < len(scores) else np.arange(len(scores))
+        extended = []
+        for index in candidates.tolist():
+            if index in chosen:
+                continue
+            distances = self.distances(index)
+            indices = tuple(sorted(chosen + (index,)))
+            extended.append((indices, self.cost(indices), np.minimum(near, distances), np.maximum(far, distances)))
+        return extended
+
+    def selection(self, state: State) -> List[dict]:
+        return [self.rooms[i] for i in state[0]]
+
+
+def greedy_search(search: Search, num_rooms: int, seeds: int) -> State:
+    best = None
+    for seed in search.seeds(seeds):
+        state = search.start(seed)
+        while len(state[0]) < num_rooms:
+            state = min(search.extend(state, 1), key=lambda s: s[1])
+        if best is None or state[1] < best[1]:
+            best = state
+    return best
+
+
+def beam_search(search: Search, num_rooms: int, width: int, branch: int = 3, deadline: Optional[float] = None) -> Optional[State]:
+    """Best selection found keeping ``width`` partial selections per step.
+
+    Returns None if ``deadline`` (a ``time.perf_counter`` value) passes first.
+    """
+    beam = [search.start(seed) for seed in search.seeds(width)]
+    for _ in range(num_rooms - 1):
+        candidates = {}
+        for state in beam:
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            for extended in search.extend(state, branch):
+                candidates.setdefault(extended[0], extended)
+        beam = sorted(candidates.values(), key=lambda s: s[1])[:width]
+    return min(beam, key=lambda s: s[1])
+
+
+StrategyFunc = Callable[..., List[dict]]
+STRATEGIES: Dict[str, StrategyFunc] = {}
+# Objectives each strategy can minimise; strategies not listed handle all
+STRATEGY_OBJECTIVES: Dict[str, Tuple[str, ...]] = {}
+
+
+def strategy(name: str, objectives: Optional[Tuple[str, ...]] = None):
+    """Register a strategy ``fn(allocator, rooms, num_rooms, objective, budget)``."""
+    def register(fn: StrategyFunc) -> StrategyFunc:
+        STRATEGIES[name] = fn
+        if objectives is not None:
+            STRATEGY_OBJECTIVES[name] = objectives
+        return fn
+    return register
+
+
+def supports(strategy_name: str, objective_name: str) -> bool:
+    return objective_name in STRATEGY_OBJECTIVES.get(strategy_name, OBJECTIVES)
+
+
+@strategy("exact", objectives=("path", "lift"))
+def exact(allocator, rooms, num_rooms, objective, budget):
+    if objective.name == "path":
+        return allocator.select_cross_floor_rooms(rooms, num_rooms)[0]
+    return sorted(rooms, key=lambda room: (room['position'], room['floor']))[:num_rooms]
+
+
+@strategy("greedy")
+def greedy(allocator, rooms, num_rooms, objective, budget, seeds=16):
+    search = Search(allocator.travel_matrix, rooms, objective)
+    return search.selection(greedy_search(search, num_rooms, seeds))
+
+
+@strategy("beam")
+def beam(allocator, rooms, num_rooms, objective, budget, width=16):
+    search = Search(allocator.travel_matrix, rooms, objective)
+    return search.selection(beam_search(search, num_rooms, width))
+
+
+@strategy("anytime")
+def anytime(allocator, rooms, num_rooms, objective, budget):
+    deadline = time.perf_counter() + budget
+    search = Search(allocator.travel_matrix, rooms, objective)
+    best = greedy_search(search, num_rooms, seeds=4)
+    width = 8
+    while time.perf_counter() < deadline and width <= 2 * len(rooms):
+        found = beam_search(search, num_rooms, width, deadline=deadline)
+        if found is None:
+            break
+        if found[1] < best[1]:
+            best = found
+        width *= 2
+    return search.selection(best)
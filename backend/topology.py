@@ -0,0 +1,137 @@
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Floors 1-9 have 10 rooms each, floor 10 has 7
+DEFAULT_ROOMS_PER_FLOOR = (10,) * 9 + (7,)
+
+DEFAULT_HOTEL_ID = "default"
+
+
+@dataclass(frozen=True)
+class Topology:
+    """Hotel layout and travel costs.
+
+    ``rooms_per_floor[i]`` is the number of rooms on floor ``i + 1``; rooms
+    are numbered ``floor * room_number_base + position`` with positions
+    counted from the stairs/lift. Moving between floors costs
+    ``floor_travel_time`` per floor plus a fixed ``lift_travel_time``.
+    """
+
+    rooms_per_floor: Tuple[int, ...] = DEFAULT_ROOMS_PER_FLOOR
+    room_travel_time: float = 1.0
+    floor_travel_time: float = 2.0
+    lift_travel_time: float = 0.0
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "Topology":
+        rooms_per_floor = config.get("rooms_per_floor", DEFAULT_ROOMS_PER_FLOOR)
+        if isinstance(rooms_per_floor, int):
+            rooms_per_floor = [rooms_per_floor] * config["floors"]
+        elif "floors" in config and config["floors"] != len(rooms_per_floor):
+            raise ValueError("floors does not match the length of rooms_per_floor")
+        if not rooms_per_floor or any(count < 1 for count in rooms_per_floor):
+            raise ValueError("Every floor needs at least one room")
+
+        return cls(
+            rooms_per_floor=tuple(rooms_per_floor),
+            room_travel_time=float(config.get("room_travel_time", cls.room_travel_time)),
+            floor_travel_time=float(config.get("floor_travel_time", cls.floor_travel_time)),
+            lift_travel_time=float(config.get("lift_travel_time", cls.lift_travel_time)),
+        )
+
+    @property
+    def floors(self) -> int:
+        return len(self.rooms_per_floor)
+
+    @property
+    def total_rooms(self) -> int:
+        return sum(self.rooms_per_floor)
+
+    @property
+    def max_position(self) -> int:
+        return max(self.rooms_per_floor)
+
+    @property
+    def room_number_base(self) -> int:
+        return 10 ** max(2, len(str(self.max_position)))
+
+    def generate_rooms(self) -> List[dict]:
+        rooms = []
+        for floor, count in enumerate(self.rooms_per_floor, start=1):
+            for pos in range(1, count + 1):
+                rooms.append({
+                    "room_number": floor * self.room_number_base + pos,
+                    "floor": floor,
+                    "position": pos,
+                    "is_booked": False,
+                    "booked_at": None,
+                    "booking_id": None,
+                    "reservations": []
+                })
+        return rooms
+
+
+class TravelMatrix:
+    """Pairwise travel costs compiled from a topology.
+
+    Travel time splits into a floor term and a position term, so two small
+    matrices indexed by floor and by position stand in for a room-by-room
+    matrix: ``cost(a, b) = floor_cost[fa, fb] + position_cost[pa, pb]``.
+    """
+
+    def __init__(self, topology: Topology):
+        self.topology = topology
+        floors = np.arange(topology.floors + 1)
+        positions = np.arange(topology.max_position + 1)
+        floor_gap = np.abs(floors[:, None] - floors[None, :])
+        self.floor_cost = floor_gap * topology.floor_travel_time + (floor_gap > 0) * topology.lift_travel_time
+        self.position_cost = np.abs(positions[:, None] - positions[None, :]) * topology.room_travel_time
+        # Per-cell offsets used to factor travel costs out of the selection DP
+        self.floor_offset = floors[:, None] * topology.floor_travel_time
+        self.position_offset = positions[None, :] * topology.room_travel_time
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.floor_cost), len(self.position_cost)
+
+
+def _read_config(path: Optional[str]) -> Optional[dict]:
+    path = path or os.environ.get("HOTEL_TOPOLOGY")
+    if not path:
+        return None
+
+    config_path = Path(path)
+    if not config_path.is_absolute():
+        config_path = Path(__file__).parent / config_path
+    with open(config_path) as f:
+        return json.load(f)
+
+
+def load_topology(path: Optional[str] = None) -> Topology:
+    """Read the topology from a JSON file, or fall back to the default layout.
+
+    The path comes from the ``HOTEL_TOPOLOGY`` environment variable when not
+    given; relative paths resolve against the backend directory.
+    """
+    config = _read_config(path)
+    return Topology.from_dict(config) if config is not None else Topology()
+
+
+def load_hotels(path: Optional[str] = None) -> Dict[str, Topology]:
+    """Read the topology of every hotel, keyed by hotel ID.
+
+    A config with a ``hotels`` object maps hotel IDs to topologies; any
+    other config, or none, is a single hotel under ``DEFAULT_HOTEL_ID``.
+    The first hotel listed is the default one.
+    """
+    config = _read_config(path)
+    if config is None or "hotels" not in config:
+        return {DEFAULT_HOTEL_ID: Topology.from_dict(config) if config is not None else Topology()}
+    if not config["hotels"]:
+        raise ValueError("hotels must define at least one hotel")
+    return {str(hotel_id): Topology.from_dict(hotel) for hotel_id, hotel in config["hotels"].items()}
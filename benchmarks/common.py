@@ -0,0 +1,74 @@
+"""Shared helpers for the benchmark scripts: latency summaries and baselines."""
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+BASELINES_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+
+def use_backend_modules():
+    """Make the backend modules importable from the benchmark scripts."""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Throughput and latency percentiles, with latencies given in seconds."""
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "throughput": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    print(f"{'case':<40} {'count':>7} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for case, stats in results.items():
+        print(f"{case:<40} {stats['count']:>7} {stats['throughput']:>10} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+
+def check_baseline(suite: str, results: Dict[str, Dict[str, float]], tolerance: float, save: bool) -> bool:
+    """Compare p95 latencies against the stored baseline, or store a new one.
+
+    A case regresses when its p95 exceeds the baseline by more than
+    ``tolerance`` (a fraction). Cases missing from the baseline are skipped.
+    """
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    if save:
+        baselines[suite] = results
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\nSaved {suite} baseline to {BASELINES_PATH}")
+        return True
+
+    baseline = baselines.get(suite)
+    if not baseline:
+        print(f"\nNo {suite} baseline stored; run with --save-baseline to create one")
+        return True
+
+    regressions = []
+    for case, stats in results.items():
+        reference = baseline.get(case)
+        if reference and stats["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{case}: p95 {stats['p95_ms']}ms vs baseline {reference['p95_ms']}ms")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return False
+    print(f"\n✅ No regressions beyond {tolerance:.0%} against the {suite} baseline")
+    return True
@@ -0,0 +1,72 @@
+"""Concurrent booking benchmark.
+
+Fires many parallel /api/book calls at a running backend, then checks that
+no room ended up in two bookings and that room state matches the bookings.
+
+    python benchmarks/concurrency.py --base-url http://localhost:8001 --bookers 200
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def book(api_url, num_rooms):
+    start = time.perf_counter()
+    response = requests.post(f"{api_url}/book", json={"num_rooms": num_rooms}, timeout=30)
+    return response.status_code, response.json(), time.perf_counter() - start
+
+
+def run(base_url, bookers, num_rooms):
+    api_url = f"{base_url}/api"
+    requests.post(f"{api_url}/reset", timeout=30).raise_for_status()
+    total_rooms = len(requests.get(f"{api_url}/rooms", timeout=30).json()["rooms"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=bookers) as pool:
+        results = list(pool.map(lambda _: book(api_url, num_rooms), range(bookers)))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _, _ in results)
+    booked = [room for status, data, _ in results if status == 200 for room in data["rooms"]]
+    duplicates = [room for room, count in Counter(booked).items() if count > 1]
+    rooms = requests.get(f"{api_url}/rooms", timeout=30).json()["rooms"]
+    booked_in_db = {room["room_number"] for room in rooms if room["is_booked"]}
+    latencies = sorted(latency for _, _, latency in results)
+
+    print(f"Bookers: {bookers} x {num_rooms} room(s) against {total_rooms} rooms")
+    print(f"Statuses: {dict(statuses)}")
+    print(f"Elapsed: {elapsed:.2f}s, throughput: {bookers / elapsed:.1f} req/s")
+    print(f"Latency p50: {latencies[len(latencies) // 2] * 1000:.1f}ms, "
+          f"p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms")
+
+    ok = True
+    if duplicates:
+        print(f"❌ Double-booked rooms: {sorted(duplicates)}")
+        ok = False
+    if booked_in_db != set(booked):
+        print(f"❌ Room state differs from bookings: {len(booked_in_db)} booked vs {len(booked)} in bookings")
+        ok = False
+    expected = min(bookers, total_rooms // num_rooms)
+    if statuses.get(200, 0) != expected:
+        print(f"❌ Expected {expected} successful bookings, got {statuses.get(200, 0)}")
+        ok = False
+    if ok:
+        print("✅ No double bookings")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--bookers", type=int, default=120)
+    parser.add_argument("--num-rooms", type=int, default=1)
+    args = parser.parse_args()
+    return 0 if run(args.base_url, args.bookers, args.num_rooms) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
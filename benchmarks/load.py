@@ -0,0 +1,115 @@
+"""Load test of the booking API with concurrent async clients.
+
+Runs against a live backend (``--base-url``) or, by default, against the app
+in-process on an in-memory mock Mongo, so no database is needed:
+
+    python benchmarks/load.py
+    python benchmarks/load.py --base-url http://localhost:8001
+    python benchmarks/load.py --topology topology.example.json --save-baseline
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import httpx
+
+from common import check_baseline, print_results, summarize, use_backend_modules
+
+
+@asynccontextmanager
+async def in_process_client(topology):
+    """Serve the app through ASGI on a mongomock database."""
+    from mongomock_motor import AsyncMongoMockClient
+
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "benchmark")
+    if topology:
+        os.environ["HOTEL_TOPOLOGY"] = topology
+    use_backend_modules()
+    import server
+
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[os.environ["DB_NAME"]]
+    await server.initialize_db()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://benchmark") as client:
+        yield client
+
+
+async def hammer(client, method, path, bodies, concurrency):
+    """Send one request per body, at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], Counter()
+
+    async def one(body):
+        async with semaphore:
+            t0 = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - t0)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(body) for body in bodies))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def run(client, requests, concurrency, reset_after=True):
+    await client.post("/api/reset")
+    total_rooms = len((await client.get("/api/rooms")).json()["rooms"])
+    # Party sizes cycle 1..5; keep the run within the hotel's capacity so
+    # every booking does real work instead of failing fast
+    parties = [i % 5 + 1 for i in range(requests)]
+    while sum(parties) > total_rooms:
+        parties.pop()
+
+    scenarios = [
+        ("POST /api/book", "POST", "/api/book", [{"num_rooms": n} for n in parties]),
+        ("GET /api/rooms", "GET", "/api/rooms", [None] * requests),
+        ("GET /api/rooms compact", "GET", "/api/rooms?format=compact", [None] * requests),
+        ("GET /api/bookings", "GET", "/api/bookings", [None] * requests),
+    ]
+    results = {}
+    for name, method, path, bodies in scenarios:
+        latencies, statuses, elapsed = await hammer(client, method, path, bodies, concurrency)
+        results[name] = summarize(latencies, elapsed)
+        if set(statuses) != {200}:
+            print(f"{name}: statuses {dict(statuses)}")
+    if reset_after:
+        await client.post("/api/reset")
+    return results
+
+
+async def main_async(args):
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+            return await run(client, args.requests, args.concurrency)
+    async with in_process_client(args.topology) as client:
+        return await run(client, args.requests, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Benchmark a running backend instead of the in-process app")
+    parser.add_argument("--topology", help="HOTEL_TOPOLOGY file for the in-process app")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    target = args.base_url or "in-process"
+    print_results(f"API load ({target}, {args.concurrency} concurrent clients)", results)
+    # Latencies depend on the run's shape, so each shape has its own baseline
+    suite = "load" if not args.base_url else "load-remote"
+    suite += f" requests={args.requests} concurrency={args.concurrency}"
+    if args.topology:
+        suite += f" topology={os.path.basename(args.topology)}"
+    return 0 if check_baseline(suite, results, args.tolerance, args.save_baseline) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Throughput of the booking API as gunicorn workers are added.
+
+Starts the backend under gunicorn with 1, 2, ... N workers against a real
+Mongo (``MONGO_URL``), runs the load test against each, and checks that no
+room was booked twice across workers. Each run uses a fresh database that
+is dropped afterwards:
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/scaling.py --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import Tuple
+
+import httpx
+from pymongo import MongoClient
+
+from common import BACKEND_DIR, check_baseline, print_results
+from load import run
+
+
+def start_backend(workers: int, port: int, db_name: str) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), DB_NAME=db_name)
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, workers: int, timeout: float = 60):
+    # Every worker loads the hotel at startup; keep polling until enough
+    # requests succeed in a row that all of them are likely up
+    deadline = time.monotonic() + timeout
+    successes = 0
+    while successes < workers * 5:
+        if time.monotonic() > deadline:
+            raise RuntimeError("Backend did not start in time")
+        try:
+            response = await client.get("/api/hotels")
+            successes = successes + 1 if response.status_code == 200 else 0
+        except httpx.TransportError:
+            successes = 0
+            await asyncio.sleep(0.2)
+
+
+async def double_bookings(client: httpx.AsyncClient) -> int:
+    response = await client.get("/api/export/bookings")
+    rooms = [room for line in response.text.splitlines() for room in json.loads(line)["rooms"]]
+    return len(rooms) - len(set(rooms))
+
+
+async def measure(workers: int, args) -> Tuple[dict, int]:
+    db_name = f"scaling_{uuid.uuid4().hex[:8]}"
+    process = start_backend(workers, args.port, db_name)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as client:
+            await wait_until_ready(client, workers)
+            results = await run(client, args.requests, args.concurrency, reset_after=False)
+            duplicates = await double_bookings(client)
+            if duplicates:
+                print(f"❌ {workers} workers: {duplicates} room(s) booked twice")
+            await client.post("/api/reset")
+            return results, duplicates
+    finally:
+        process.terminate()
+        process.wait()
+        MongoClient(os.environ["MONGO_URL"]).drop_database(db_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+    if "MONGO_URL" not in os.environ:
+        parser.error("MONGO_URL must point at a running Mongo")
+
+    results = {}
+    double_booked = False
+    for workers in args.workers:
+        measured, duplicates = asyncio.run(measure(workers, args))
+        double_booked = double_booked or duplicates > 0
+        for case, stats in measured.items():
+            results[f"{workers} workers: {case}"] = stats
+
+    print_results(f"Worker scaling ({args.concurrency} concurrent clients)", results)
+    base = {case.split(": ", 1)[1]: stats["throughput"] for case, stats in results.items() if case.startswith(f"{args.workers[0]} workers")}
+    print(f"\n{'case':<40} {'speedup':>8}")
+    for case, stats in results.items():
+        reference = base.get(case.split(": ", 1)[1])
+        if reference:
+            print(f"{case:<40} {stats['throughput'] / reference:>7.2f}x")
+    suite = f"scaling requests={args.requests} concurrency={args.concurrency}"
+    within_baseline = check_baseline(suite, results, args.tolerance, args.save_baseline)
+    return 0 if within_baseline and not double_booked else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
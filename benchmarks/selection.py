@@ -0,0 +1,114 @@
+"""Micro-benchmark of the room selection engine.
+
+Times Allocator.select_optimal_rooms across hotel sizes, occupancy levels
+and party sizes, entirely in memory. Besides random occupancy, hotels of
+many short floors with at most two free rooms per floor exercise the
+cross-floor search at scale. Each snapshot is loaded into an
+OccupancyEngine and selections use its free-run index, as the API does.
+``--strategies`` compares cross-floor
+strategies; cases for strategies other than exact are suffixed with the
+strategy name.
+
+    python benchmarks/selection.py
+    python benchmarks/selection.py --strategies exact greedy beam anytime
+    python benchmarks/selection.py --save-baseline
+"""
+import argparse
+import random
+import sys
+import time
+
+from common import check_baseline, print_results, summarize, use_backend_modules
+
+use_backend_modules()
+from allocation import Allocator  # noqa: E402
+from occupancy import OccupancyEngine  # noqa: E402
+from topology import Topology  # noqa: E402
+
+HOTELS = {
+    "97": Topology(),
+    "1000": Topology.from_dict({"floors": 20, "rooms_per_floor": 50}),
+    "5000": Topology.from_dict({"floors": 50, "rooms_per_floor": 100}),
+}
+OCCUPANCY_LEVELS = (0.0, 0.3, 0.6, 0.9, 0.97)
+PARTY_SIZES = (1, 3, 5)
+# Many short floors with at most SCATTERED_FREE free rooms each, so parties
+# of 3 and 5 always take the cross-floor search at scale
+SCATTERED_HOTELS = {
+    "1000x10": Topology.from_dict({"floors": 100, "rooms_per_floor": 10}),
+    "5000x10": Topology.from_dict({"floors": 500, "rooms_per_floor": 10}),
+}
+SCATTERED_FREE = 2
+
+
+def snapshot(rooms, free):
+    engine = OccupancyEngine()
+    engine.load([{**room, "is_booked": room["room_number"] not in free} for room in rooms])
+    return engine.available_rooms(), engine.free_runs
+
+
+def scattered_free(rng, rooms):
+    by_floor = {}
+    for room in rooms:
+        by_floor.setdefault(room["floor"], []).append(room["room_number"])
+    return {
+        number
+        for numbers in by_floor.values()
+        for number in rng.sample(numbers, rng.randint(0, SCATTERED_FREE))
+    }
+
+
+def time_selections(allocator, snapshots, party, strategy):
+    latencies = []
+    start = time.perf_counter()
+    for available, free_runs in snapshots:
+        t0 = time.perf_counter()
+        allocator.select_optimal_rooms(available, party, strategy, free_runs=free_runs)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run(repeats: int, seed: int, strategies=("exact",)):
+    rng = random.Random(seed)
+    results = {}
+    for hotel, topology in HOTELS.items():
+        allocator = Allocator(topology)
+        rooms = topology.generate_rooms()
+        for occupancy in OCCUPANCY_LEVELS:
+            free_count = max(max(PARTY_SIZES), round(len(rooms) * (1 - occupancy)))
+            snapshots = [
+                snapshot(rooms, {room["room_number"] for room in rng.sample(rooms, free_count)})
+                for _ in range(repeats)
+            ]
+            for party in PARTY_SIZES:
+                for strategy in strategies:
+                    suffix = "" if strategy == "exact" else f" {strategy}"
+                    results[f"rooms={hotel} occ={occupancy:.0%} party={party}{suffix}"] = time_selections(allocator, snapshots, party, strategy)
+
+    for hotel, topology in SCATTERED_HOTELS.items():
+        allocator = Allocator(topology)
+        rooms = topology.generate_rooms()
+        snapshots = [snapshot(rooms, scattered_free(rng, rooms)) for _ in range(repeats)]
+        for party in PARTY_SIZES[1:]:
+            for strategy in strategies:
+                suffix = "" if strategy == "exact" else f" {strategy}"
+                results[f"rooms={hotel} free<={SCATTERED_FREE}/floor party={party}{suffix}"] = time_selections(allocator, snapshots, party, strategy)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--strategies", nargs="+", default=["exact"])
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.repeats, args.seed, args.strategies)
+    print_results("Selection engine", results)
+    return 0 if check_baseline("selection", results, args.tolerance, args.save_baseline) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Offline what-if simulator for allocation policies.
+
+Replays booking traces (party sizes in arrival order, plus cancellations)
+through Allocator.select_optimal_rooms on an in-memory OccupancyEngine, with
+no Mongo and no HTTP. Every (hotel, trace, strategy, objective) combination
+runs in its own process, and the results are aggregated per policy:
+
+    python benchmarks/simulate.py
+    python benchmarks/simulate.py --strategies exact greedy anytime --objectives path spread
+    python benchmarks/simulate.py --topology topology.example.json --traces 8 --events 5000
+    python benchmarks/simulate.py --trace bookings.ndjson --json results.json
+
+A recorded trace is NDJSON with one event per line: ``{"op": "book", "id":
+"a", "party": 3}`` or ``{"op": "cancel", "id": "a"}``. Lines exported by
+``GET /api/export/bookings`` are also accepted, as bookings whose party size
+is the number of rooms.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from common import percentile, use_backend_modules
+
+use_backend_modules()
+from allocation import Allocator  # noqa: E402
+from compaction import stranded  # noqa: E402
+from occupancy import OccupancyEngine  # noqa: E402
+from topology import Topology, load_topology  # noqa: E402
+
+PARTY_WEIGHTS = (0.3, 0.3, 0.2, 0.1, 0.1)
+
+
+def generate_trace(total_rooms: int, events: int, cancel_rate: float, seed: int) -> List[dict]:
+    """Bookings with party sizes 1-5, each event cancelling a live booking
+    with probability ``cancel_rate``, sized to keep the hotel near full."""
+    rng = random.Random(seed)
+    trace, live, next_id, booked = [], [], 0, 0
+    for _ in range(events):
+        if live and (rng.random() < cancel_rate or booked >= total_rooms * 0.95):
+            booking_id, party = live.pop(rng.randrange(len(live)))
+            booked -= party
+            trace.append({"op": "cancel", "id": booking_id})
+        else:
+            party = rng.choices(range(1, 6), PARTY_WEIGHTS)[0]
+            booking_id = str(next_id)
+            next_id += 1
+            live.append((booking_id, party))
+            booked += party
+            trace.append({"op": "book", "id": booking_id, "party": party})
+    return trace
+
+
+def read_trace(path: str) -> List[dict]:
+    trace = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if "op" not in event:
+                event = {"op": "book", "id": event["booking_id"], "party": len(event["rooms"])}
+            trace.append(event)
+    return trace
+
+
+def fragmentation(engine: OccupancyEngine) -> float:
+    """Share of free rooms outside the longest free run on their floor."""
+    free_total = stranded_total = 0
+    for floor, full in engine.full_masks.items():
+        free = full & ~engine.masks[floor]
+        free_total += free.bit_count()
+        stranded_total += stranded(free)
+    return stranded_total / free_total if free_total else 0.0
+
+
+def replay(topology: Topology, trace: List[dict], strategy: str, objective: str, budget_ms: float) -> Optional[dict]:
+    """Run one trace under one policy; None if the policy cannot run on it."""
+    try:
+        allocator = Allocator(topology, strategy=strategy, objective=objective, budget_ms=budget_ms)
+    except ValueError:
+        return None
+    engine = OccupancyEngine()
+    engine.load(topology.generate_rooms())
+    live: Dict[str, List[int]] = {}
+    travel_times, latencies, fragmentations = [], [], []
+    rejected = cross_floor = 0
+
+    for event in trace:
+        if event["op"] == "cancel":
+            rooms = live.pop(event["id"], None)
+            if rooms:
+                engine.release(rooms)
+        else:
+            available = engine.available_rooms()
+            if len(available) < event["party"]:
+                rejected += 1
+                continue
+            t0 = time.perf_counter()
+            selected, travel_time = allocator.select_optimal_rooms(available, event["party"], free_runs=engine.free_runs)
+            latencies.append(time.perf_counter() - t0)
+            room_numbers = [room["room_number"] for room in selected]
+            engine.book(room_numbers, "simulated")
+            live[event["id"]] = room_numbers
+            travel_times.append(travel_time)
+            cross_floor += len({room["floor"] for room in selected}) > 1
+        fragmentations.append(fragmentation(engine))
+
+    return {
+        "bookings": len(travel_times),
+        "rejected": rejected,
+        "cross_floor": cross_floor,
+        "travel_time": sum(travel_times),
+        "fragmentation": sum(fragmentations) / len(fragmentations) if fragmentations else 0.0,
+        "latencies": latencies,
+    }
+
+
+def run_job(job: dict) -> dict:
+    return {**job, "result": replay(job["topology"], job["trace"], job["strategy"], job["objective"], job["budget_ms"])}
+
+
+def aggregate(finished: List[dict]) -> Dict[str, dict]:
+    grouped = defaultdict(list)
+    for job in finished:
+        if job["result"] is not None:
+            grouped[f"{job['strategy']}/{job['objective']}"].append(job["result"])
+
+    summary = {}
+    for policy, results in grouped.items():
+        bookings = sum(r["bookings"] for r in results)
+        latencies = sorted(latency for r in results for latency in r["latencies"])
+        summary[policy] = {
+            "runs": len(results),
+            "bookings": bookings,
+            "rejected": sum(r["rejected"] for r in results),
+            "cross_floor_share": round(sum(r["cross_floor"] for r in results) / bookings, 4) if bookings else 0.0,
+            "mean_travel_time": round(sum(r["travel_time"] for r in results) / bookings, 3) if bookings else 0.0,
+            "fragmentation": round(sum(r["fragmentation"] for r in results) / len(results), 4),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        }
+    return summary
+
+
+def print_summary(summary: Dict[str, dict], skipped: List[str]):
+    print(f"\n{'policy':<20} {'runs':>5} {'bookings':>9} {'rejected':>9} {'cross %':>8} "
+          f"{'travel':>8} {'frag':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for policy, stats in sorted(summary.items(), key=lambda item: item[1]["mean_travel_time"]):
+        print(f"{policy:<20} {stats['runs']:>5} {stats['bookings']:>9} {stats['rejected']:>9} "
+              f"{stats['cross_floor_share'] * 100:>7.1f}% {stats['mean_travel_time']:>8} "
+              f"{stats['fragmentation']:>7} {stats['p50_ms']:>8} {stats['p95_ms']:>8}")
+    for policy in skipped:
+        print(f"{policy:<20} not supported")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topology", action="append", help="Hotel topology JSON; repeat for several hotels")
+    parser.add_argument("--trace", action="append", help="Recorded NDJSON trace; repeat for several")
+    parser.add_argument("--traces", type=int, default=4, help="Generated traces per hotel and cancel rate")
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--cancel-rates", type=float, nargs="+", default=[0.1, 0.3])
+    parser.add_argument("--strategies", nargs="+", default=["exact", "greedy", "beam", "anytime"])
+    parser.add_argument("--objectives", nargs="+", default=["path"])
+    parser.add_argument("--budget-ms", type=float, default=5.0)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    topologies = [load_topology(path) for path in args.topology] if args.topology else [Topology()]
+    traces = []
+    for topology in topologies:
+        if args.trace:
+            traces += [(topology, read_trace(path)) for path in args.trace]
+            continue
+        for cancel_rate in args.cancel_rates:
+            for i in range(args.traces):
+                seed = args.seed * 1000 + i
+                traces.append((topology, generate_trace(topology.total_rooms, args.events, cancel_rate, seed)))
+
+    jobs = [
+        {"topology": topology, "trace": trace, "strategy": strategy, "objective": objective, "budget_ms": args.budget_ms}
+        for topology, trace in traces
+        for strategy in args.strategies
+        for objective in args.objectives
+    ]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as pool:
+        finished = list(pool.map(run_job, jobs))
+    print(f"Replayed {len(traces)} trace(s) under {len(args.strategies) * len(args.objectives)} "
+          f"policies in {time.perf_counter() - start:.1f}s")
+
+    summary = aggregate(finished)
+    skipped = sorted({f"{job['strategy']}/{job['objective']}" for job in finished if job["result"] is None} - set(summary))
+    print_summary(summary, skipped)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,20 +19,25 @@ function App() {
   const [lastBookedRooms, setLastBookedRooms] = useState([]);
 
   useEffect(() => {
-    fetchRooms();
+    // The stream opens with a snapshot of the room list, then patches.
+    // EventSource reconnects on its own and resumes from the last event id;
+    // the server sends a new snapshot only if the missed patches are gone or
+    // were numbered by another backend worker.
+    const source = new EventSource(`${API}/rooms/events`);
+    source.addEventListener("snapshot", (event) => {
+      setRooms(JSON.parse(event.data).rooms);
+    });
+    source.addEventListener("rooms", (event) => {
+      const changes = new Map(JSON.parse(event.data).map(change => [change.room_number, change]));
+      setRooms(prev => prev.map(room => (
+        changes.has(room.room_number) ? { ...room, ...changes.get(room.room_number) } : room
+      )));
+    });
+
     fetchBookings();
+    return () => source.close();
   }, []);
 
-  const fetchRooms = async () => {
-    try {
-      const response = await axios.get(`${API}/rooms`);
-      setRooms(response.data.rooms);
-    } catch (error) {
-      console.error("Error fetching rooms:", error);
-      toast.error("Failed to load rooms");
-    }
-  };
-
   const fetchBookings = async () => {
     try {
       const response = await axios.get(`${API}/bookings`);
@@ -53,7 +58,6 @@ function App() {
       const response = await axios.post(`${API}/book`, { num_rooms: numRooms });
       toast.success(`Booked ${response.data.rooms.length} rooms! Travel time: ${response.data.total_travel_time.toFixed(1)} min`);
       setLastBookedRooms(response.data.rooms);
-      await fetchRooms();
       await fetchBookings();
       
       // Clear highlight after 3 seconds
@@ -72,7 +76,6 @@ function App() {
       await axios.post(`${API}/reset`);
       toast.success("All bookings cleared");
       setLastBookedRooms([]);
-      await fetchRooms();
       await fetchBookings();
     } catch (error) {
       toast.error("Failed to reset bookings");
@@ -87,7 +90,6 @@ function App() {
       const response = await axios.post(`${API}/random`);
       toast.success(`Generated random occupancy: ${response.data.rooms_booked} rooms booked`);
       setLastBookedRooms([]);
-      await fetchRooms();
     } catch (error) {
       toast.error("Failed to generate random occupancy");
     } finally {
@@ -103,6 +105,7 @@ function App() {
     }
     roomsByFloor[room.floor].push(room);
   });
+  const floors = Object.keys(roomsByFloor).map(Number).sort((a, b) => b - a);
 
   const getRoomStyle = (room) => {
     if (lastBookedRooms.includes(room.room_number)) {
@@ -240,7 +243,7 @@ function App() {
 
         {/* Room Grid */}
         <div className="room-grid-container">
-          {[10, 9, 8, 7, 6, 5, 4, 3, 2, 1].map(floor => (
+          {floors.map(floor => (
             <div key={floor} className="floor-row">
               <div className="floor-label">F{floor}</div>
               <div className="rooms-row">
@@ -0,0 +1,55 @@
+import itertools
+import random
+
+import pytest
+
+from allocation import Allocator
+from topology import Topology
+
+
+def brute_force_minimum(allocator: Allocator, rooms, num_rooms: int) -> float:
+    ordered = sorted(rooms, key=lambda room: (room['floor'], room['position']))
+    return min(
+        allocator.calculate_total_travel_time(list(combination))
+        for combination in itertools.combinations(ordered, num_rooms)
+    )
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_cross_floor_selection_matches_brute_force(seed):
+    rng = random.Random(seed)
+    topology = Topology.from_dict({
+        "rooms_per_floor": [rng.randint(1, 6) for _ in range(rng.randint(1, 5))],
+        "room_travel_time": rng.choice([0.5, 1, 2]),
+        "floor_travel_time": rng.choice([1, 2, 5]),
+        "lift_travel_time": rng.choice([0, 1, 3]),
+    })
+    allocator = Allocator(topology)
+    rooms = topology.generate_rooms()
+    available = rng.sample(rooms, rng.randint(1, min(len(rooms), 12)))
+    num_rooms = rng.randint(1, min(len(available), 5))
+
+    selected, travel_time = allocator.select_cross_floor_rooms(available, num_rooms)
+
+    assert len(selected) == num_rooms
+    assert len({room['room_number'] for room in selected}) == num_rooms
+    assert all(room in available for room in selected)
+    assert travel_time == pytest.approx(allocator.calculate_total_travel_time(selected))
+    assert travel_time == pytest.approx(brute_force_minimum(allocator, available, num_rooms))
+
+
+def test_cross_floor_selection_rejects_too_few_rooms():
+    allocator = Allocator(Topology())
+    with pytest.raises(ValueError):
+        allocator.select_cross_floor_rooms(Topology().generate_rooms()[:2], 3)
+
+
+def test_same_floor_prefers_the_tightest_block():
+    topology = Topology()
+    allocator = Allocator(topology)
+    available = [room for room in topology.generate_rooms() if room['room_number'] in (101, 102, 105, 106, 203, 204, 205, 206)]
+
+    selected, travel_time = allocator.select_optimal_rooms(available, 4)
+
+    assert [room['room_number'] for room in selected] == [203, 204, 205, 206]
+    assert travel_time == 3.0
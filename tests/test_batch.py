@@ -0,0 +1,37 @@
+import pytest
+
+
+def test_small_batches_try_every_distinct_order(api):
+    async def scenario(client, server):
+        return [server.party_orders(parties) for parties in ([4, 2, 1], [2, 2, 1], [1, 2, 3, 4, 5])]
+
+    mixed, repeated, large = api(scenario)
+
+    assert len(mixed) == 6
+    # Equal parties are interchangeable
+    assert len(repeated) == 3
+    assert large == [(4, 3, 2, 1, 0), (0, 1, 2, 3, 4)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_plan_is_no_worse_than_largest_first(api, seed):
+    parties = [3, 2, 2, 1]
+
+    async def scenario(client, server):
+        hotel = server.get_hotel(None)
+        await client.post("/api/random", json={"seed": seed})
+        stay = server.Stay.resolve(None, None, server.datetime.now(server.timezone.utc).date())
+        rooms = hotel.occupancy.available_rooms(stay)
+        strategy, objective = hotel.allocator.resolve(None, None)
+        largest_first = tuple(sorted(range(len(parties)), key=lambda i: -parties[i]))
+
+        greedy = server.place_parties(hotel, rooms, parties, largest_first, None, strategy, objective, None)
+        plans = server.plan_parties(hotel, rooms, parties)
+        return greedy, plans
+
+    greedy, plans = api(scenario)
+    rooms = [room for room_numbers, _ in plans for room in room_numbers]
+
+    assert [len(room_numbers) for room_numbers, _ in plans] == parties
+    assert len(set(rooms)) == len(rooms)
+    assert sum(t for _, t in plans) <= sum(t for _, t in greedy) + 1e-9
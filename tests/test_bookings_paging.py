@@ -0,0 +1,62 @@
+import pytest
+from fastapi import HTTPException
+
+
+def test_cursor_round_trip(api):
+    async def scenario(client, server):
+        booking = {"created_at": "2025-02-03T12:00:00+00:00", "booking_id": "BK1"}
+        return server.decode_cursor(server.encode_cursor(booking))
+
+    assert api(scenario) == ("2025-02-03T12:00:00+00:00", "BK1")
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "W10=", "eyJhIjogMX0="])
+def test_invalid_cursors_are_rejected(api, cursor):
+    async def scenario(client, server):
+        with pytest.raises(HTTPException) as error:
+            server.decode_cursor(cursor)
+        response = await client.get("/api/bookings", params={"cursor": cursor})
+        return error.value.status_code, response.status_code
+
+    assert api(scenario) == (400, 400)
+
+
+def test_pages_cover_every_booking_once_newest_first(api):
+    async def scenario(client, server):
+        # A batch shares one created_at, so ties are broken by booking_id
+        await client.post("/api/book/batch", json={"num_rooms": [1, 1, 1, 1]})
+        for _ in range(3):
+            await client.post("/api/book", json={"num_rooms": 1})
+        await client.post("/api/book/batch", json={"num_rooms": [2, 2]})
+
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get("/api/bookings", params=params)).json()
+            pages.append(page["bookings"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    pages = api(scenario)
+    bookings = [booking for page in pages for booking in page]
+    keys = [(booking["created_at"], booking["booking_id"]) for booking in bookings]
+
+    assert [len(page) for page in pages] == [3, 3, 3]
+    assert len(set(keys)) == 9
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_filters_apply_across_pages(api):
+    async def scenario(client, server):
+        await client.post("/api/book/batch", json={"num_rooms": [2, 1, 2, 1, 2]})
+        first = (await client.get("/api/bookings", params={"limit": 2, "num_rooms": 2})).json()
+        second = (await client.get(
+            "/api/bookings", params={"limit": 2, "num_rooms": 2, "cursor": first["next_cursor"]}
+        )).json()
+        return first, second
+
+    first, second = api(scenario)
+
+    assert [len(booking["rooms"]) for booking in first["bookings"] + second["bookings"]] == [2, 2, 2]
+    assert second["next_cursor"] is None
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+
+from compaction import CompactionPlanner, flush_windows, longest_run, stranded
+from occupancy import OccupancyEngine
+from topology import Topology
+
+
+def bits(mask: int):
+    return [position for position in range(mask.bit_length()) if mask >> position & 1]
+
+
+def brute_longest_run(mask: int) -> int:
+    best = run = 0
+    for position in range(mask.bit_length() + 1):
+        run = run + 1 if mask >> position & 1 else 0
+        best = max(best, run)
+    return best
+
+
+def brute_flush_windows(mask: int, size: int):
+    def free(position):
+        return position >= 0 and bool(mask >> position & 1)
+
+    return [
+        start for start in range(mask.bit_length())
+        if all(free(start + i) for i in range(size)) and (not free(start - 1) or not free(start + size))
+    ]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_bit_helpers_match_brute_force(seed):
+    rng = random.Random(seed)
+    # Position 0 is never a room
+    mask = rng.getrandbits(rng.randint(1, 24)) & ~1
+
+    assert longest_run(mask) == brute_longest_run(mask)
+    assert stranded(mask) == len(bits(mask)) - brute_longest_run(mask)
+    for size in range(1, 6):
+        assert flush_windows(mask, size) == brute_flush_windows(mask, size)
+
+
+def test_flush_windows_skip_the_middle_of_a_run():
+    # Rooms 1-6 free: only windows touching either end keep the rest whole
+    assert flush_windows(0b1111110, 2) == [1, 5]
+
+
+def make_engine(rooms_per_floor, bookings):
+    engine = OccupancyEngine()
+    engine.load(Topology(rooms_per_floor=rooms_per_floor).generate_rooms())
+    for booking_id, room_numbers in bookings.items():
+        engine.book(room_numbers, "2025-02-03T12:00:00+00:00", booking_id)
+    return engine
+
+
+def plan_for(engine, max_moves=10):
+    return CompactionPlanner(engine, engine.available_rooms()).plan(max_moves)
+
+
+def test_compact_hotel_needs_no_moves():
+    plan = plan_for(make_engine((6, 6), {"a": [101, 102], "b": [201]}))
+
+    assert plan == {"moves": [], "stranded_rooms_before": 0, "stranded_rooms_after": 0}
+
+
+def test_moving_a_booking_reunites_free_rooms():
+    # 103 splits floor 1's free rooms into 101-102 and 104-106
+    plan = plan_for(make_engine((6,), {"a": [103]}))
+
+    assert plan["stranded_rooms_before"] == 2
+    assert plan["moves"] == [{"booking_id": "a", "from": [103], "to": [101], "stranded_rooms_recovered": 2}]
+    assert plan["stranded_rooms_after"] == 0
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_plans_are_consistent(seed):
+    rng = random.Random(seed)
+    topology = Topology(rooms_per_floor=(8, 8, 8))
+    rooms = [room["room_number"] for room in topology.generate_rooms()]
+    booked = rng.sample(rooms, rng.randint(3, 15))
+    bookings = {f"b{i}": [room] for i, room in enumerate(booked)}
+    engine = make_engine(topology.rooms_per_floor, bookings)
+
+    plan = plan_for(engine)
+
+    assert plan["stranded_rooms_after"] <= plan["stranded_rooms_before"]
+    assert sum(move["stranded_rooms_recovered"] for move in plan["moves"]) == (
+        plan["stranded_rooms_before"] - plan["stranded_rooms_after"]
+    )
+    occupied = set(booked)
+    for move in plan["moves"]:
+        assert move["stranded_rooms_recovered"] > 0
+        assert not occupied & set(move["to"])
+        occupied = occupied - set(move["from"]) | set(move["to"])
+        floors = {engine.rooms[number]["floor"] for number in move["to"]}
+        positions = sorted(engine.rooms[number]["position"] for number in move["to"])
+        assert len(floors) == 1 and positions == list(range(positions[0], positions[0] + len(positions)))
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from freeruns import FreeRunIndex, tightest_block, tightest_window
+from occupancy import OccupancyEngine
+from reservations import Stay
+from topology import Topology
+
+TONIGHT = Stay("2025-02-03", "2025-02-04", False, True)
+TOMORROW = Stay("2025-02-04", "2025-02-05", False, True)
+
+
+def make_engine(rooms_per_floor=(10, 10, 10)) -> OccupancyEngine:
+    engine = OccupancyEngine()
+    engine.load(Topology(rooms_per_floor=rooms_per_floor).generate_rooms())
+    return engine
+
+
+def best_span(engine: OccupancyEngine, stay: Stay, num_rooms: int):
+    block = tightest_block(engine.available_rooms(stay), num_rooms)
+    return None if block is None else block[-1]["position"] - block[0]["position"]
+
+
+def index_span(engine: OccupancyEngine, stay: Stay, num_rooms: int):
+    block = engine.free_runs_for(stay).block(num_rooms)
+    return None if block is None else block[-1]["position"] - block[0]["position"]
+
+
+def test_tightest_window():
+    assert tightest_window([1, 2, 5, 6, 7], 3) == (2, 2)
+    assert tightest_window([1, 4, 5], 2) == (1, 1)
+    assert tightest_window([1, 2], 3) is None
+
+
+def test_index_breaks_ties_by_lowest_floor_then_position():
+    index = FreeRunIndex()
+    rooms = {floor: [{"floor": floor, "position": p} for p in (1, 2, 5, 6)] for floor in (1, 2)}
+    index.update(rooms)
+
+    assert [(room["floor"], room["position"]) for room in index.block(2)] == [(1, 1), (1, 2)]
+    assert index.block(5) is None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_index_matches_a_full_scan_through_bookings_and_reservations(seed):
+    rng = random.Random(seed)
+    engine = make_engine()
+    engine.free_runs_for(TONIGHT)
+    for step in range(60):
+        room_number = rng.choice(engine.room_numbers)
+        action = rng.random()
+        if action < 0.4 and not engine.is_booked(room_number):
+            engine.book([room_number], "2025-02-03T12:00:00+00:00", f"walk-{step}")
+        elif action < 0.6 and engine.is_booked(room_number):
+            engine.release([room_number])
+        elif action < 0.8:
+            index = engine.reservations.get(room_number)
+            if index is None or not index.overlaps(TONIGHT.check_in, TONIGHT.check_out):
+                engine.reserve([room_number], TONIGHT._replace(reserved=True), f"dated-{step}")
+        elif engine.reservations.get(room_number):
+            engine.unreserve([room_number], engine.reservations[room_number].booking_ids[0])
+
+        for num_rooms in range(1, 6):
+            assert index_span(engine, TONIGHT, num_rooms) == best_span(engine, TONIGHT, num_rooms)
+
+
+def test_reservations_for_tonight_leave_the_index():
+    engine = make_engine((3,))
+    engine.reserve([101, 102], TONIGHT._replace(reserved=True), "dated")
+
+    assert [room["room_number"] for room in engine.free_runs_for(TONIGHT).block(1)] == [103]
+    assert engine.free_runs_for(TONIGHT).block(2) is None
+
+    engine.unreserve([102], "dated")
+    assert [room["room_number"] for room in engine.free_runs_for(TONIGHT).block(2)] == [102, 103]
+
+
+def test_synced_reservations_update_the_index():
+    engine = make_engine((3,))
+    engine.free_runs_for(TONIGHT)
+    engine.sync([{
+        "room_number": 102,
+        "is_booked": False,
+        "reservations": [{"check_in": "2025-02-03", "check_out": "2025-02-05", "booking_id": "other"}],
+    }])
+
+    assert [room["room_number"] for room in engine.free_runs_for(TONIGHT).block(2)] == [101, 103]
+    assert engine.free_runs_for(TONIGHT).block(3) is None
+
+
+def test_index_is_rebuilt_for_a_new_date():
+    engine = make_engine((3,))
+    engine.reserve([102], TOMORROW._replace(reserved=True), "tomorrow")
+
+    assert index_span(engine, TONIGHT, 3) == 2
+    assert index_span(engine, TOMORROW, 2) == 2
+    assert engine.free_runs_for(TOMORROW).block(3) is None
+
+
+def test_index_is_skipped_for_other_stays():
+    engine = make_engine((3,))
+
+    assert engine.free_runs_for(Stay("2025-02-03", "2025-02-05", True, True)) is None
+    assert engine.free_runs_for(Stay("2025-02-04", "2025-02-05", True, False)) is None
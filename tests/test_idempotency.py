@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+
+def test_retry_replays_the_stored_response(api):
+    async def scenario(client, server):
+        headers = {"Idempotency-Key": "retry"}
+        first = await client.post("/api/book", json={"num_rooms": 2}, headers=headers)
+        second = await client.post("/api/book", json={"num_rooms": 2}, headers=headers)
+        # Replays survive the in-memory cache being lost, e.g. on another worker
+        server.idempotent_responses.clear()
+        third = await client.post("/api/book", json={"num_rooms": 2}, headers=headers)
+        return first, second, third, await server.db.bookings.count_documents({})
+
+    first, second, third, bookings = api(scenario)
+
+    assert first.status_code == 200 and "Idempotent-Replayed" not in first.headers
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert third.headers["Idempotent-Replayed"] == "true"
+    assert first.json() == second.json() == third.json()
+    assert bookings == 1
+
+
+def test_key_reused_with_another_request_is_rejected(api):
+    async def scenario(client, server):
+        headers = {"Idempotency-Key": "reused"}
+        await client.post("/api/book", json={"num_rooms": 2}, headers=headers)
+        return await client.post("/api/book", json={"num_rooms": 3}, headers=headers)
+
+    assert api(scenario).status_code == 422
+
+
+def test_key_held_by_a_running_request_gets_409(api):
+    async def scenario(client, server):
+        now = datetime.now(timezone.utc)
+        await server.db.idempotency_keys.insert_one({
+            "hotel_id": "default",
+            "key": "running",
+            "request": server.BookingRequest(num_rooms=2).model_dump(mode="json"),
+            "response": None,
+            "locked_until": now + timedelta(seconds=30),
+            "expires_at": now + timedelta(hours=1),
+        })
+        return await client.post("/api/book", json={"num_rooms": 2}, headers={"Idempotency-Key": "running"})
+
+    response = api(scenario)
+
+    assert response.status_code == 409
+
+
+def test_stalled_request_is_taken_over(api):
+    async def scenario(client, server):
+        now = datetime.now(timezone.utc)
+        await server.db.idempotency_keys.insert_one({
+            "hotel_id": "default",
+            "key": "stalled",
+            "request": server.BookingRequest(num_rooms=2).model_dump(mode="json"),
+            "response": None,
+            "locked_until": now - timedelta(seconds=1),
+            "expires_at": now + timedelta(hours=1),
+        })
+        response = await client.post("/api/book", json={"num_rooms": 2}, headers={"Idempotency-Key": "stalled"})
+        key = await server.db.idempotency_keys.find_one({"key": "stalled"})
+        return response, key
+
+    response, key = api(scenario)
+
+    assert response.status_code == 200
+    assert key["response"]["booking_id"] == response.json()["booking_id"]
+
+
+def test_failed_request_releases_the_key(api):
+    async def scenario(client, server):
+        headers = {"Idempotency-Key": "failed"}
+        await client.post("/api/random", json={"occupancy": 100, "seed": 1})
+        failed = await client.post("/api/book", json={"num_rooms": 2}, headers=headers)
+        await client.post("/api/reset")
+        retried = await client.post("/api/book", json={"num_rooms": 2}, headers=headers)
+        return failed, retried
+
+    failed, retried = api(scenario)
+
+    assert failed.status_code == 400
+    assert retried.status_code == 200 and "Idempotent-Replayed" not in retried.headers
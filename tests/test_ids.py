@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from ids import BookingIdGenerator, id_timestamp_ms
+
+
+def test_ids_in_one_millisecond_are_unique_and_increasing(monkeypatch):
+    monkeypatch.setattr("ids.time.time_ns", lambda: 1_700_000_000_000 * 1_000_000)
+    generate = BookingIdGenerator(node_id=7)
+
+    ids = [generate() for _ in range(1000)]
+
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert {id_timestamp_ms(booking_id) for booking_id in ids} == {1_700_000_000_000}
+
+
+def test_ids_keep_increasing_when_the_clock_steps_back(monkeypatch):
+    clock = iter([5_000, 5_000, 4_000, 4_000, 6_000])
+    monkeypatch.setattr("ids.time.time_ns", lambda: next(clock) * 1_000_000)
+    generate = BookingIdGenerator(node_id=1)
+
+    ids = [generate() for _ in range(5)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_sequence_overflow_borrows_the_next_millisecond(monkeypatch):
+    monkeypatch.setattr("ids.time.time_ns", lambda: 1_000 * 1_000_000)
+    generate = BookingIdGenerator(node_id=1)
+
+    ids = [generate() for _ in range((1 << 16) + 1)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert id_timestamp_ms(ids[-1]) == 1_001
+
+
+def test_ids_are_unique_across_threads():
+    generate = BookingIdGenerator(node_id=3)
+    ids = []
+    lock = threading.Lock()
+
+    def worker():
+        batch = [generate() for _ in range(2000)]
+        with lock:
+            ids.extend(batch)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == len(ids) == 16000
+
+
+def test_node_id_must_fit_in_16_bits():
+    with pytest.raises(ValueError):
+        BookingIdGenerator(node_id=1 << 16)
@@ -0,0 +1,87 @@
+from datetime import date
+
+import pytest
+
+from occupancy import OccupancyEngine
+from reservations import IntervalIndex, Stay
+from topology import Topology
+
+
+def make_index(*intervals):
+    index = IntervalIndex()
+    for start, end, booking_id in intervals:
+        index.add(start, end, booking_id)
+    return index
+
+
+def test_overlaps_treats_intervals_as_half_open():
+    index = make_index(("2025-02-03", "2025-02-05", "a"))
+
+    assert index.overlaps("2025-02-04", "2025-02-06")
+    assert index.overlaps("2025-02-01", "2025-02-04")
+    assert index.overlaps("2025-02-01", "2025-02-10")
+    assert not index.overlaps("2025-02-01", "2025-02-03")
+    assert not index.overlaps("2025-02-05", "2025-02-07")
+
+
+def test_add_keeps_intervals_sorted():
+    index = make_index(
+        ("2025-02-10", "2025-02-12", "c"),
+        ("2025-02-01", "2025-02-03", "a"),
+        ("2025-02-05", "2025-02-06", "b"),
+    )
+
+    assert index.starts == ["2025-02-01", "2025-02-05", "2025-02-10"]
+    assert index.ends == ["2025-02-03", "2025-02-06", "2025-02-12"]
+    assert index.booking_ids == ["a", "b", "c"]
+    assert not index.overlaps("2025-02-03", "2025-02-05")
+    assert index.overlaps("2025-02-06", "2025-02-11")
+
+
+def test_add_rejects_overlapping_interval():
+    index = make_index(("2025-02-03", "2025-02-05", "a"))
+
+    with pytest.raises(ValueError):
+        index.add("2025-02-04", "2025-02-08", "b")
+    assert len(index) == 1
+
+
+def test_remove_frees_the_nights():
+    index = make_index(("2025-02-03", "2025-02-05", "a"), ("2025-02-05", "2025-02-07", "b"))
+
+    assert index.remove("a")
+    assert not index.remove("a")
+    assert not index.overlaps("2025-02-03", "2025-02-05")
+    assert index.booking_ids == ["b"]
+
+
+def test_stay_resolve():
+    today = date(2025, 2, 3)
+
+    assert Stay.resolve(None, None, today) == Stay("2025-02-03", "2025-02-04", False, True)
+    assert Stay.resolve(date(2025, 2, 3), date(2025, 2, 5), today) == Stay("2025-02-03", "2025-02-05", True, True)
+    assert Stay.resolve(date(2025, 2, 4), date(2025, 2, 5), today).current is False
+    with pytest.raises(ValueError):
+        Stay.resolve(date(2025, 2, 2), date(2025, 2, 5), today)
+
+
+def test_walk_ins_only_block_stays_that_include_tonight():
+    engine = OccupancyEngine()
+    engine.load(Topology(rooms_per_floor=(3,)).generate_rooms())
+    engine.book([101, 102], "2025-02-03T20:00:00+00:00", "walk-in")
+    engine.reserve([103], Stay("2025-02-04", "2025-02-06", True, False), "dated")
+
+    tonight = Stay("2025-02-03", "2025-02-04", False, True)
+    tomorrow = Stay("2025-02-04", "2025-02-05", True, False)
+
+    assert [room["room_number"] for room in engine.available_rooms(tonight)] == [103]
+    assert [room["room_number"] for room in engine.available_rooms(tomorrow)] == [101, 102]
+
+
+def test_booked_before_finds_walk_ins_from_earlier_dates():
+    engine = OccupancyEngine()
+    engine.load(Topology(rooms_per_floor=(3,)).generate_rooms())
+    engine.book([101], "2025-02-02T23:59:00+00:00", "yesterday")
+    engine.book([102], "2025-02-03T00:01:00+00:00", "today")
+
+    assert engine.booked_before("2025-02-03") == [101]
@@ -0,0 +1,96 @@
+import itertools
+import random
+
+import pytest
+
+from allocation import Allocator
+from strategies import OBJECTIVES, STRATEGIES, Objective, strategy, supports
+from topology import Topology, TravelMatrix
+
+
+def scattered_rooms(topology: Topology, rng: random.Random, per_floor: int = 2):
+    # At most per_floor free rooms on each floor, so parties must cross floors
+    rooms = topology.generate_rooms()
+    free = []
+    for floor in range(1, topology.floors + 1):
+        on_floor = [room for room in rooms if room['floor'] == floor]
+        free += rng.sample(on_floor, min(per_floor, len(on_floor)))
+    return free
+
+
+def test_registry_lists_every_strategy_and_objective():
+    assert set(STRATEGIES) == {"exact", "greedy", "beam", "anytime"}
+    assert set(OBJECTIVES) == {"path", "spread", "lift"}
+
+
+def test_supports():
+    assert supports("exact", "path")
+    assert supports("exact", "lift")
+    assert not supports("exact", "spread")
+    for name in ("greedy", "beam", "anytime"):
+        assert all(supports(name, objective) for objective in OBJECTIVES)
+
+
+def test_registered_strategy_without_objectives_supports_all(monkeypatch):
+    monkeypatch.setattr("strategies.STRATEGIES", dict(STRATEGIES))
+
+    @strategy("first")
+    def first(allocator, rooms, num_rooms, objective, budget):
+        return rooms[:num_rooms]
+
+    assert all(supports("first", objective) for objective in OBJECTIVES)
+
+
+def test_objective_must_implement_cost_and_step():
+    class CostOnly(Objective):
+        name = "cost-only"
+
+        def cost(self, travel_matrix, rooms):
+            return 0.0
+
+    with pytest.raises(TypeError):
+        CostOnly()
+
+
+@pytest.mark.parametrize("strategy_name,objective", [
+    ("nope", "path"), ("exact", "nope"), ("exact", "spread"),
+])
+def test_resolve_rejects_unknown_and_unsupported_pairs(strategy_name, objective):
+    allocator = Allocator(Topology())
+
+    with pytest.raises(ValueError):
+        allocator.resolve(strategy_name, objective)
+    with pytest.raises(ValueError):
+        Allocator(Topology(), strategy=strategy_name, objective=objective)
+
+
+@pytest.mark.parametrize("objective", sorted(OBJECTIVES))
+@pytest.mark.parametrize("strategy_name", sorted(STRATEGIES))
+def test_strategies_pick_valid_cross_floor_selections(strategy_name, objective):
+    if not supports(strategy_name, objective):
+        pytest.skip("unsupported pair")
+    rng = random.Random(7)
+    topology = Topology(rooms_per_floor=(6,) * 6)
+    allocator = Allocator(topology, strategy=strategy_name, objective=objective)
+    available = scattered_rooms(topology, rng)
+
+    selected, travel_time = allocator.select_optimal_rooms(available, 4)
+
+    assert len({room['room_number'] for room in selected}) == 4
+    assert all(room in available for room in selected)
+    assert travel_time == pytest.approx(allocator.calculate_total_travel_time(selected))
+
+
+@pytest.mark.parametrize("objective", ["path", "lift"])
+def test_exact_is_optimal_for_its_objectives(objective):
+    rng = random.Random(3)
+    topology = Topology(rooms_per_floor=(6,) * 5)
+    travel_matrix = TravelMatrix(topology)
+    allocator = Allocator(topology, strategy="exact", objective=objective)
+    available = scattered_rooms(topology, rng)
+
+    selected, _ = allocator.select_optimal_rooms(available, 3)
+
+    cost = OBJECTIVES[objective].cost
+    best = min(cost(travel_matrix, list(combination)) for combination in itertools.combinations(available, 3))
+    assert cost(travel_matrix, selected) == pytest.approx(best)